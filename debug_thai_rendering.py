@@ -3,10 +3,79 @@
 Diagnostic script to identify why Thai text is still rendering incorrectly.
 """
 
+import functools
 import os
 import sys
 import json
 
+import numpy as np
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    # orjson not installed, fall back to the stdlib parser
+    _json_loads = json.loads
+
+
+# font_path -> (blob, face, font), so repeated checks only pay for shaping
+_FONT_CACHE: dict[str, tuple] = {}
+
+
+def _get_font(font_path, scale=(12 * 64, 12 * 64)):
+    """Load a font once and return the cached (blob, face, font) triple."""
+    cached = _FONT_CACHE.get(font_path)
+    if cached is not None:
+        return cached
+
+    import uharfbuzz as hb
+
+    # HarfBuzz maps the file itself, avoiding a copy through a Python bytes
+    blob = hb.Blob.from_file_path(font_path)
+    face = hb.Face(blob)
+    font = hb.Font(face)
+    font.scale = scale
+
+    cached = (blob, face, font)
+    _FONT_CACHE[font_path] = cached
+    return cached
+
+
+# Thai OpenType features, built once and passed to every hb.shape() call so
+# the same (face, script, features) shape plan is reused. uharfbuzz only
+# accepts a {tag: value} dict here.
+_THAI_FEATURES = {
+    "liga": True,  # Ligatures
+    "kern": True,  # Kerning
+    "mark": True,  # Mark positioning
+    "mkmk": True,  # Mark-to-mark positioning
+    "ccmp": True,  # Glyph composition/decomposition
+}
+
+# Sample sentences for the complex shaping test
+_THAI_TEST_TEXTS = (
+    "ไก่ที่เป่าปี่",
+    "ผู้หญิงคนนั้นสวยมาก",
+)
+
+
+# One HarfBuzz buffer reused across shaping calls; clear_contents() keeps its
+# allocations, so callers should reset it rather than creating a new Buffer.
+_SHARED_BUF = None
+
+
+def _get_buffer():
+    """Return the shared HarfBuzz buffer, emptied and ready for add_str()."""
+    global _SHARED_BUF
+    if _SHARED_BUF is None:
+        import uharfbuzz as hb
+
+        _SHARED_BUF = hb.Buffer()
+    else:
+        _SHARED_BUF.clear_contents()
+    return _SHARED_BUF
+
 def check_harfbuzz_installation():
     """Check if HarfBuzz is properly installed."""
     print("1. HARFBUZZ INSTALLATION CHECK")
@@ -22,6 +91,17 @@ def check_harfbuzz_installation():
         print("   Install with: pip install uharfbuzz")
         return False
 
+@functools.lru_cache(maxsize=1)
+def _load_config_cached(path, mtime):
+    """Parse a config file; keyed on mtime so an edited file is re-read."""
+    with open(path, "rb") as f:
+        return _json_loads(f.read())
+
+
+def _load_config(path="config/config.json"):
+    """Load a JSON config file, reusing the parse while it is unchanged."""
+    return _load_config_cached(path, os.path.getmtime(path))
+
 def check_configuration():
     """Check project configuration."""
     print("\n2. CONFIGURATION CHECK")
@@ -30,8 +110,7 @@ def check_configuration():
     config_path = "config/config.json"
     if os.path.exists(config_path):
         try:
-            with open(config_path, 'r') as f:
-                config = json.load(f)
+            config = _load_config(config_path)
 
             print("✅ Config file found")
 
@@ -72,23 +151,21 @@ def test_font_loading(font_path):
     try:
         import uharfbuzz as hb
 
-        # Try to load the font
-        with open(font_path, 'rb') as f:
-            font_data = f.read()
-
-        face = hb.Face(font_data)
-        font = hb.Font(face)
-        font.scale = (12 * 64, 12 * 64)  # 12pt size
+        # Try to load the font (12pt size)
+        _, face, font = _get_font(font_path)
 
         print(f"✅ Font loaded successfully")
-        print(f"   Font file size: {len(font_data)} bytes")
+        print(f"   Font file size: {os.path.getsize(font_path)} bytes")
 
         # Test with a simple Thai character
-        buf = hb.Buffer()
+        buf = _get_buffer()
         buf.add_str("ก")  # Simple Thai consonant
-        buf.guess_segment_properties()
+        # Segment properties are known, so skip guess_segment_properties()
+        buf.direction = "ltr"
+        buf.script = "thai"
+        buf.language = "th"
 
-        hb.shape(font, buf)
+        hb.shape(font, buf, _THAI_FEATURES)
 
         glyph_infos = buf.glyph_infos
         glyph_positions = buf.glyph_positions
@@ -110,84 +187,80 @@ def test_font_loading(font_path):
 
 def test_complex_thai_shaping(font_path):
     """Test complex Thai shaping."""
-    print("\n4. COMPLEX THAI SHAPING TEST")
-    print("=" * 35)
-
-    if not font_path or not os.path.exists(font_path):
-        print("❌ Cannot test - font path invalid")
-        return False
-
+    # Collect the report and write it once rather than flushing per line
+    out = []
+    emit = out.append
     try:
-        import uharfbuzz as hb
-
-        # Load font
-        with open(font_path, 'rb') as f:
-            font_data = f.read()
-        face = hb.Face(font_data)
-        font = hb.Font(face)
-        font.scale = (12 * 64, 12 * 64)
-
-        # Test complex Thai sentence
-        test_text = "ไก่ที่เป่าปี่"
-        print(f"Testing: '{test_text}'")
-
-        buf = hb.Buffer()
-        buf.add_str(test_text)
-        buf.guess_segment_properties()
-        buf.script = "thai"
-
-        # Enable Thai features
-        features = [
-            ("liga", True),
-            ("kern", True),
-            ("mark", True),
-            ("mkmk", True),
-            ("ccmp", True),
-        ]
-
-        hb.shape(font, buf, features)
-
-        glyph_infos = buf.glyph_infos
-        glyph_positions = buf.glyph_positions
+        emit("\n4. COMPLEX THAI SHAPING TEST")
+        emit("=" * 35)
 
-        print(f"Input: {len(test_text)} characters")
-        print(f"Output: {len(glyph_infos)} glyphs")
-
-        if len(glyph_infos) == 0:
-            print("❌ No glyphs produced - shaping completely failed")
+        if not font_path or not os.path.exists(font_path):
+            emit("❌ Cannot test - font path invalid")
             return False
 
-        print("\nGlyph Analysis:")
-        for i, (info, pos) in enumerate(zip(glyph_infos, glyph_positions)):
-            x_advance = pos.x_advance / 64.0
-            y_advance = pos.y_advance / 64.0
-            x_offset = pos.x_offset / 64.0
-            y_offset = pos.y_offset / 64.0
-
-            char_idx = info.cluster if info.cluster < len(test_text) else 0
-            char = test_text[char_idx] if char_idx < len(test_text) else '?'
-
-            print(f"  {i:2d}: '{char}' cluster={info.cluster} glyph={info.codepoint}")
-            print(f"      advance=({x_advance:.1f}, {y_advance:.1f}) offset=({x_offset:.1f}, {y_offset:.1f})")
-
-        # Check for combining marks with offsets
-        marks_with_offsets = 0
-        for i, (info, pos) in enumerate(zip(glyph_infos, glyph_positions)):
-            if pos.x_offset != 0 or pos.y_offset != 0:
-                marks_with_offsets += 1
-
-        print(f"\n✅ Shaping successful!")
-        print(f"   Glyphs with positioning offsets: {marks_with_offsets}")
-
-        if marks_with_offsets == 0:
-            print("⚠️  WARNING: No glyphs have positioning offsets")
-            print("   This might indicate the font doesn't have proper mark positioning")
-
-        return True
+        try:
+            import uharfbuzz as hb
+
+            # Load font (reuses the face parsed by the font loading test)
+            _, _, font = _get_font(font_path)
+
+            # Shape every sample through the same font, buffer and features so
+            # HarfBuzz reuses its shape plan; reporting happens afterwards.
+            results = []
+            for test_text in _THAI_TEST_TEXTS:
+                buf = _get_buffer()
+                buf.add_str(test_text)
+                buf.direction = "ltr"
+                buf.script = "thai"
+                buf.language = "th"
+
+                hb.shape(font, buf, _THAI_FEATURES)
+                results.append((test_text, buf.glyph_infos, buf.glyph_positions))
+
+            marks_with_offsets = 0
+            for test_text, glyph_infos, glyph_positions in results:
+                emit(f"Testing: '{test_text}'")
+                emit(f"Input: {len(test_text)} characters")
+                emit(f"Output: {len(glyph_infos)} glyphs")
+
+                if len(glyph_infos) == 0:
+                    emit("❌ No glyphs produced - shaping completely failed")
+                    return False
+
+                # (x_advance, y_advance, x_offset, y_offset) per glyph, 26.6 -> points
+                arr = np.fromiter(
+                    ((p.x_advance, p.y_advance, p.x_offset, p.y_offset) for p in glyph_positions),
+                    dtype=np.dtype((np.int32, 4)),
+                    count=len(glyph_positions),
+                )
+                floats = arr.astype(np.float32) * (1.0 / 64.0)
+
+                emit("\nGlyph Analysis:")
+                for i, (info, (x_advance, y_advance, x_offset, y_offset)) in enumerate(zip(glyph_infos, floats)):
+                    char_idx = info.cluster if info.cluster < len(test_text) else 0
+                    char = test_text[char_idx] if char_idx < len(test_text) else '?'
+
+                    emit(f"  {i:2d}: '{char}' cluster={info.cluster} glyph={info.codepoint}")
+                    emit(f"      advance=({x_advance:.1f}, {y_advance:.1f}) offset=({x_offset:.1f}, {y_offset:.1f})")
+                emit("")
+
+                # Check for combining marks with offsets
+                marks_with_offsets += int(np.count_nonzero(arr[:, 2] | arr[:, 3]))
+
+            emit(f"✅ Shaping successful!")
+            emit(f"   Glyphs with positioning offsets: {marks_with_offsets}")
+
+            if marks_with_offsets == 0:
+                emit("⚠️  WARNING: No glyphs have positioning offsets")
+                emit("   This might indicate the font doesn't have proper mark positioning")
+
+            return True
 
-    except Exception as e:
-        print(f"❌ Complex shaping test failed: {e}")
-        return False
+        except Exception as e:
+            emit(f"❌ Complex shaping test failed: {e}")
+            return False
+    finally:
+        sys.stdout.write("\n".join(out) + "\n")
 
 def check_text_shaper_integration():
     """Test the text shaper integration."""
@@ -282,26 +355,20 @@ def main():
     print("DIAGNOSTIC SUMMARY")
     print("=" * 50)
 
-    issues = []
-    if not harfbuzz_ok:
-        issues.append("HarfBuzz not installed")
-    if not shaping_enabled:
-        issues.append("Text shaping disabled in config")
-    if not font_path:
-        issues.append("No font path configured")
-    if font_path and not os.path.exists(font_path):
-        issues.append("Font file not found")
-    if not font_ok:
-        issues.append("Font loading failed")
-    if not complex_ok:
-        issues.append("Complex Thai shaping failed")
-    if not integration_ok:
-        issues.append("Text shaper integration failed")
+    checks = (
+        (not harfbuzz_ok, "HarfBuzz not installed"),
+        (not shaping_enabled, "Text shaping disabled in config"),
+        (not font_path, "No font path configured"),
+        (font_path and not os.path.exists(font_path), "Font file not found"),
+        (not font_ok, "Font loading failed"),
+        (not complex_ok, "Complex Thai shaping failed"),
+        (not integration_ok, "Text shaper integration failed"),
+    )
+    issues = "\n".join(f"   - {issue}" for failed, issue in checks if failed)
 
     if issues:
         print("❌ ISSUES FOUND:")
-        for issue in issues:
-            print(f"   - {issue}")
+        print(issues)
         print("\nFIX THESE ISSUES TO ENABLE PROPER THAI RENDERING")
     else:
         print("✅ ALL TESTS PASSED - Implementation should work!")
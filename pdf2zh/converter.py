@@ -1,22 +1,35 @@
+import bisect
 import concurrent.futures
+import itertools
 import logging
+import math
+import os
 import re
+import struct
 import unicodedata
 from enum import Enum
+from functools import cache, lru_cache
 from string import Template
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 from pdfminer.converter import PDFConverter
 from pdfminer.layout import LTChar, LTFigure, LTLine, LTPage
-from pdfminer.pdffont import PDFCIDFont, PDFUnicodeNotDefined
+from pdfminer.pdffont import PDFCIDFont, PDFFont, PDFUnicodeNotDefined
 from pdfminer.pdfinterp import PDFGraphicState, PDFResourceManager
 from pdfminer.utils import apply_matrix_pt, mult_matrix
 from pymupdf import Font
 from tenacity import retry, wait_fixed
 
 from pdf2zh.config import ConfigManager
-from pdf2zh.text_shaper import get_text_shaper
+
+try:
+    import nlpo3  # newmm 分词的 Rust 实现，可选依赖
+
+    NLPO3_AVAILABLE = True
+except ImportError:
+    NLPO3_AVAILABLE = False
+from pdf2zh.text_shaper import GlyphInfo, get_text_shaper
 from pdf2zh.translator import (
     AnythingLLMTranslator,
     ArgosTranslator,
@@ -46,6 +59,88 @@ from pdf2zh.translator import (
 
 log = logging.getLogger(__name__)
 
+# 文字修饰符、数学符号、分隔符号
+_MARK_CATS = frozenset({"Lm", "Mn", "Sk", "Sm", "Zl", "Zp", "Zs"})
+# 泰文字符
+_THAI_RE = re.compile("[\u0e00-\u0e7f]")
+# 非泰文换行时可断开的空白与标点
+_BREAK_CHARS = " \t\n.,;:!?"
+# 译文中的零宽空格词界提示
+_WORD_HINT_RE = re.compile("\u200b")
+# 译文中的 {vn} 公式标记
+_VMARK_RE = re.compile(r"\{\s*v([\d\s]+)\}", re.IGNORECASE)
+# 分词前按 {vn} 标记切分，标记保留在奇数位
+_VMARK_SPLIT_RE = re.compile(r"(\{v\d+\})")
+# BMP 码位 -> 1 表示公式字符（上述类别或希腊字母），供 vflag 直接查表
+_MATH_CHARS = bytes(
+    unicodedata.category(chr(cp)) in _MARK_CATS or 0x370 <= cp < 0x400
+    for cp in range(0x10000)
+)
+
+
+# 无宽度的组合符号（泰文声调、上下元音等），排版时不前进
+@cache
+def _is_nonspacing(ch: str) -> bool:
+    return unicodedata.category(ch) == "Mn"
+
+
+@cache
+def _thai_tokenizer(engine: str, backend: str) -> Callable[[str], List[str]]:
+    """每种分词引擎只创建一次分词器；newmm 在装有 nlpo3 时默认使用其 Rust 实现"""
+    if engine == "newmm" and backend in ("auto", "nlpo3"):
+        if NLPO3_AVAILABLE:
+            from pythainlp.corpus import corpus_path
+
+            # 与 pythainlp 的 newmm 使用同一份词典
+            nlpo3.load_dict(os.path.join(corpus_path(), "words_th.txt"), "pdf2zh_newmm")
+            return lambda text: nlpo3.segment(text, "pdf2zh_newmm")
+        if backend == "nlpo3":
+            log.warning(
+                "nlpo3 not available, using pythainlp for Thai word segmentation"
+            )
+    from pythainlp.tokenize import Tokenizer
+
+    return Tokenizer(engine=engine).word_tokenize
+
+
+# 泰文分词结果缓存条数，可用 THAI_TOKENIZER_CACHE 配置
+_THAI_TOKENIZER_CACHE_SIZE = 4096
+try:
+    _THAI_TOKENIZER_CACHE_SIZE = int(
+        ConfigManager.get("THAI_TOKENIZER_CACHE") or _THAI_TOKENIZER_CACHE_SIZE
+    )
+except (ValueError, TypeError):
+    log.warning(
+        "Invalid THAI_TOKENIZER_CACHE, using default: %d", _THAI_TOKENIZER_CACHE_SIZE
+    )
+
+
+@lru_cache(maxsize=_THAI_TOKENIZER_CACHE_SIZE)
+def _tokenize_thai(text: str, engine: str, backend: str = "auto") -> Tuple[str, ...]:
+    """泰文分词，重复出现的句段（页眉、图注等）只切分一次"""
+    return tuple(_thai_tokenizer(engine, backend)(text))
+
+
+class _UnitWidths(dict):
+    """字号为 1 时的字宽表 {字符: 宽度}，首次查到某字符时向字体取宽"""
+
+    def __init__(self, width_of):
+        super().__init__({"\u200B": 0.0})  # Zero-width space has no width
+        self._width_of = width_of
+
+    def __missing__(self, char: str) -> float:
+        if _is_nonspacing(char):  # Thai combining marks have no advance
+            width = 0.0
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(
+                    "🇹🇭 _calculate_text_width: Thai combining mark '%s' set to 0.0pt",
+                    char,
+                )
+        else:
+            width = self._width_of(char)
+        self[char] = width
+        return width
+
 
 class PDFConverterEx(PDFConverter):
     def __init__(
@@ -150,11 +245,29 @@ class TranslateConverter(PDFConverterEx):
         super().__init__(rsrcmgr)
         self.vfont = vfont
         self.vchar = vchar
+        # vflag 每个字符都会调用，正则预编译
+        self._re_cid = re.compile(r"\(cid:")
+        self._re_latex_font = re.compile(r"(CM[^R]|MS.M|XY|MT|BL|RM|EU|LA|RS|LINE|LCIRCLE|TeX-|rsfs|txsy|wasy|stmary|.*Mono|.*Code|.*Ital|.*Sym|.*Math)")
+        self._re_vfont = re.compile(vfont) if vfont else None
+        self._re_vchar = re.compile(vchar) if vchar else None
+        self._vflag_font_cache: dict = {}   # 字体名 -> 是否公式字体，字体远少于字符
         self.thread = thread
         self.layout = layout
         self.noto_name = noto_name
         self.noto = noto
         self.text_shaper = get_text_shaper()
+        # 文档内段落译文缓存 {原文: 译文}，跨页复用
+        self._page_trans_cache: Dict[str, str] = {}
+        # noto 字体字形缓存 {码位: 字形 ID}
+        self._gid_cache: Dict[int, int] = {}
+        # 字体文件路径缓存 {字体 ID: 路径}
+        self._font_path_cache: Dict[str, str] = {}
+        # 当前页面的字体表，由解释器在处理页面前替换
+        self.fontmap: Dict[object, PDFFont] = {}
+        self._tiro_font = None
+        self._tiro_cache: Dict[int, tuple] = {}
+        # 各字体字号为 1 时的字宽缓存 {字体对象: {字符: 宽度}}，供 _calculate_text_width 使用
+        self._unit_width_cache: Dict[object, "_UnitWidths"] = {}
         self.translator: BaseTranslator = None
         # e.g. "ollama:gemma2:9b" -> ["ollama", "gemma2:9b"]
         param = service.split(":", 1)
@@ -169,8 +282,63 @@ class TranslateConverter(PDFConverterEx):
         if not self.translator:
             raise ValueError("Unsupported translation service")
 
+        # 行距与字号缩放在整个文档内不变，只读取一次配置
+        target_lang = self.translator.lang_out.lower()
+        lang_key = target_lang.upper().replace('-', '_')
+
+        # 根据目标语言获取默认行距
+        LANG_LINEHEIGHT_MAP = {
+            "zh-cn": 1.4, "zh-tw": 1.4, "zh-hans": 1.4, "zh-hant": 1.4, "zh": 1.4,
+            "ja": 1.1, "ko": 1.2, "en": 1.2, "ar": 1.0, "ru": 0.8, "uk": 0.8, "ta": 0.8,
+            "th": 1.5  # Increased line spacing for Thai
+        }
+        self._line_height: float = LANG_LINEHEIGHT_MAP.get(target_lang, 1.1)  # 小语种默认1.1
+        custom_line_height = ConfigManager.get(f"LANG_LINEHEIGHT_{lang_key}")
+        if custom_line_height:
+            try:
+                self._line_height = float(custom_line_height)
+            except (ValueError, TypeError):
+                log.warning(f"⚠️  Invalid line height value, using default: {self._line_height}")
+
+        # 根据目标语言获取字体大小缩放比例
+        LANG_FONTSIZE_SCALE = {
+            "th": 0.7,  # Reduce Thai font size to 70%
+        }
+        self._font_size_scale: float = LANG_FONTSIZE_SCALE.get(target_lang, 1.0)
+        custom_font_scale = ConfigManager.get(f"LANG_FONTSIZE_SCALE_{lang_key}")
+        if custom_font_scale:
+            try:
+                self._font_size_scale = float(custom_font_scale)
+            except (ValueError, TypeError):
+                log.warning(f"⚠️  Invalid font scale value, using default: {self._font_size_scale}")
+
+        log.debug("line_height=%.2f font_scale=%.2f lang=%s", self._line_height, self._font_size_scale, target_lang)
+
+        # 泰文分词与换行配置同样只读取一次，换行时不再查询配置
+        self._thai_wrap_enabled: bool = (ConfigManager.get("THAI_WORD_WRAP_ENABLED") or "true").lower() == "true"
+        self._thai_engine: str = ConfigManager.get("THAI_TOKENIZER_ENGINE") or "newmm"
+        self._thai_backend: str = ConfigManager.get("THAI_TOKENIZER_BACKEND") or "auto"
+        self._thai_min_usage: float = 0.3
+        custom_min_usage = ConfigManager.get("THAI_MIN_LINE_USAGE")
+        if custom_min_usage:
+            try:
+                self._thai_min_usage = float(custom_min_usage)
+            except (ValueError, TypeError):
+                log.warning(f"⚠️  Invalid Thai minimum line usage, using default: {self._thai_min_usage}")
+
+        # 排版指令模板，逐条生成时免去重复解析 f-string
+        self._op_txt_fmt = "/{} {:f} Tf 1 0 0 1 {:f} {:f} Tm [<{}>] TJ ".format
+        self._op_line_fmt = "ET q 1 0 0 1 {:f} {:f} cm [] 0 d 0 J {:f} w 0 0 m {:f} {:f} l S Q BT ".format
+
     def _get_font_path(self, font_name: str) -> str:
-        """Get font file path for text shaping."""
+        """Get font file path for text shaping, resolved once per font name."""
+        font_path = self._font_path_cache.get(font_name)
+        if font_path is None:
+            font_path = self._font_path_cache[font_name] = self._resolve_font_path(font_name)
+        return font_path
+
+    def _resolve_font_path(self, font_name: str) -> str:
+        """Look up the font file path for font_name in the config."""
         if font_name == self.noto_name:
             # Use the Noto font path from config
             noto_path = ConfigManager.get("NOTO_FONT_PATH")
@@ -182,7 +350,7 @@ class TranslateConverter(PDFConverterEx):
         noto_path = ConfigManager.get("NOTO_FONT_PATH")
         return noto_path if noto_path else ""
 
-    def _shape_text_run(self, text: str, font_name: str, font_size: float, scaled_font_size: float) -> List[Dict]:
+    def _shape_text_run(self, text: str, font_name: str, font_size: float, scaled_font_size: float) -> List[GlyphInfo]:
         """
         Shape a text run and return detailed glyph positioning information.
 
@@ -193,45 +361,38 @@ class TranslateConverter(PDFConverterEx):
             scaled_font_size: Scaled font size for rendering
 
         Returns:
-            List of glyph dictionaries with positioning information
+            List of GlyphInfo with positioning information; each glyph's
+            cluster is the index of its first character in text
         """
         # Try HarfBuzz shaping first for complex scripts
         font_path = self._get_font_path(font_name)
 
         # Check if text needs complex shaping
-        needs_shaping = self.text_shaper._needs_shaping(text) if self.text_shaper.enabled else False
+        needs_shaping = self.text_shaper.needs_shaping(text)
 
-        if font_path and self.text_shaper.enabled and len(text) > 0:
-            log.debug(f"🔍 Checking text '{text}' (font: {font_name}, needs_shaping: {needs_shaping})")
+        if font_path and needs_shaping:
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("🔍 Checking text '%s' (font: %s, needs_shaping: %s)", text, font_name, needs_shaping)
 
             shaped_text = self.text_shaper.shape_text(text, font_path, scaled_font_size)
             if shaped_text and shaped_text.success:
-                # Convert HarfBuzz glyphs to our format
-                glyphs = []
-                for glyph in shaped_text.glyphs:
-                    glyphs.append({
-                        'glyph_id': glyph.glyph_id,
-                        'cluster': glyph.cluster,
-                        'x_advance': glyph.x_advance,
-                        'y_advance': glyph.y_advance,
-                        'x_offset': glyph.x_offset,
-                        'y_offset': glyph.y_offset,
-                        'char_index': glyph.cluster if glyph.cluster < len(text) else 0
-                    })
-                log.info(f"🇹🇭 THAI SHAPING SUCCESS: '{text}' -> {len(glyphs)} glyphs (advance: {shaped_text.total_advance:.2f}pt)")
-
-                # Log detailed glyph information for Thai text
-                if any(0x0E00 <= ord(ch) <= 0x0E7F for ch in text):  # Contains Thai characters
-                    for i, glyph in enumerate(glyphs[:6]):  # Show first 6 glyphs
-                        log.info(f"   [{i}] ID:{glyph['glyph_id']}, cluster:{glyph['cluster']}, "
-                                 f"advance:{glyph['x_advance']:.1f}, offset:({glyph['x_offset']:.1f},{glyph['y_offset']:.1f})")
-                    if len(glyphs) > 6:
-                        log.info(f"   ... and {len(glyphs) - 6} more glyphs")
+                # HarfBuzz glyphs are immutable records, shared with the shaper cache
+                glyphs = list(shaped_text.glyphs)
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("🇹🇭 THAI SHAPING SUCCESS: '%s' -> %d glyphs (advance: %.2fpt)", text, len(glyphs), shaped_text.total_advance)
+
+                    # Log detailed glyph information for Thai text
+                    if _THAI_RE.search(text):  # Contains Thai characters
+                        for i, glyph in enumerate(glyphs[:6]):  # Show first 6 glyphs
+                            log.debug("   [%d] ID:%d, cluster:%d, advance:%.1f, offset:(%.1f,%.1f)",
+                                      i, glyph.glyph_id, glyph.cluster, glyph.x_advance, glyph.x_offset, glyph.y_offset)
+                        if len(glyphs) > 6:
+                            log.debug("   ... and %d more glyphs", len(glyphs) - 6)
 
                 return glyphs
             else:
-                log.debug(f"❌ HarfBuzz shaping failed for '{text}' - falling back to simple processing")
-        else:
+                log.debug("❌ HarfBuzz shaping failed for '%s' - falling back to simple processing", text)
+        elif log.isEnabledFor(logging.DEBUG):
             # Log why HarfBuzz wasn't used
             reasons = []
             if not font_path:
@@ -240,42 +401,80 @@ class TranslateConverter(PDFConverterEx):
                 reasons.append("text shaper disabled")
             if len(text) == 0:
                 reasons.append("empty text")
+            elif self.text_shaper.enabled and not needs_shaping:
+                reasons.append("no complex script")
 
-            log.debug(f"⚠️ Skipping HarfBuzz for '{text}' ({', '.join(reasons)}) - using fallback")
+            log.debug("⚠️ Skipping HarfBuzz for '%s' (%s) - using fallback", text, ", ".join(reasons))
 
         # Fallback: create simple glyph list for character-by-character processing
         glyphs = []
         for i, ch in enumerate(text):
-            if ch == '\u200B':  # Zero-width space has no advance
-                advance = 0.0
-            elif unicodedata.category(ch) == 'Mn':  # Thai combining marks (tone marks, vowels)
+            if ch == '\u200B':  # Zero-width space is only a break hint, it has no glyph
+                continue
+            if _is_nonspacing(ch):  # Thai combining marks (tone marks, vowels)
                 advance = 0.0  # Combining marks should not advance the cursor
-                log.debug(f"🇹🇭 _shape_text_run fallback: Thai combining mark '{ch}' advance set to 0.0pt")
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("🇹🇭 _shape_text_run fallback: Thai combining mark '%s' advance set to 0.0pt", ch)
             elif font_name == self.noto_name and self.noto:
                 advance = self.noto.char_lengths(ch, scaled_font_size)[0]
-            elif hasattr(self, 'fontmap') and font_name in self.fontmap:
+            elif font_name in self.fontmap:
                 advance = self.fontmap[font_name].char_width(ord(ch)) * scaled_font_size
             else:
                 # Default advance when no font info available
                 advance = scaled_font_size * 0.6  # Rough estimate
 
-            glyphs.append({
-                'glyph_id': ord(ch),
-                'cluster': i,
-                'x_advance': advance,
-                'y_advance': 0.0,
-                'x_offset': 0.0,
-                'y_offset': 0.0,
-                'char_index': i
-            })
+            glyphs.append(GlyphInfo(ord(ch), i, advance, 0.0, 0.0, 0.0))
 
         # Log fallback info more prominently for Thai text
-        if any(0x0E00 <= ord(ch) <= 0x0E7F for ch in text):  # Contains Thai characters
-            log.warning(f"⚠️ THAI FALLBACK: '{text}' using simple processing instead of HarfBuzz (needs_shaping: {needs_shaping})")
-        else:
-            log.debug(f"📏 Fallback processing for '{text}': {len(glyphs)} glyphs (needs_shaping: {needs_shaping})")
+        if log.isEnabledFor(logging.WARNING) and _THAI_RE.search(text):  # Contains Thai characters
+            log.warning("⚠️ THAI FALLBACK: '%s' using simple processing instead of HarfBuzz (needs_shaping: %s)", text, needs_shaping)
+        elif log.isEnabledFor(logging.DEBUG):
+            log.debug("📏 Fallback processing for '%s': %d glyphs (needs_shaping: %s)", text, len(glyphs), needs_shaping)
         return glyphs
 
+    def _shape_paragraph(self, text: str):
+        """
+        Shape a whole translated paragraph once with the Noto font.
+
+        Args:
+            text: Paragraph text, possibly containing zero-width space hints
+
+        Returns:
+            (positions, clusters, glyph_ids) for _slice_paragraph_glyphs, or
+            None if the paragraph could not be shaped in logical order
+        """
+        font_path = self._get_font_path(self.noto_name)
+        if not font_path:
+            return None
+        try:
+            shaped = self.text_shaper.shape_text(text.replace('\u200B', ''), font_path, 12.0)
+        except Exception as e:
+            log.warning(f"⚠️ Error in paragraph shaping: {e}")
+            return None
+        if not shaped or not shaped.success:
+            return None
+
+        clusters = [glyph.cluster for glyph in shaped.glyphs]
+        if any(a > b for a, b in zip(clusters, clusters[1:])):  # RTL runs, slice per run instead
+            return None
+        # positions[i]: index of text[i] once zero-width spaces are removed
+        positions = list(itertools.accumulate((c != '\u200B' for c in text), initial=0))
+        return positions, clusters, [glyph.glyph_id for glyph in shaped.glyphs]
+
+    def _prefetch_paragraph_shapes(self, texts: List[str]) -> None:
+        """Batch-shape the runs of the paragraphs _shape_paragraph will shape on this page."""
+        font_path = self._get_font_path(self.noto_name)
+        if font_path and len(texts) > 1:
+            self.text_shaper.prefetch_runs([text.replace('\u200B', '') for text in texts], font_path, 12.0)
+
+    @staticmethod
+    def _slice_paragraph_glyphs(para_shape, start: int, end: int) -> List[int]:
+        """Glyph IDs of a paragraph shaped by _shape_paragraph for text[start:end]."""
+        positions, clusters, glyph_ids = para_shape
+        lo = bisect.bisect_left(clusters, positions[start])
+        hi = bisect.bisect_left(clusters, positions[end])
+        return glyph_ids[lo:hi]
+
     def _get_thai_word_boundaries(self, text: str) -> List[int]:
         """
         Get word boundary positions for Thai text using pythainlp.
@@ -286,18 +485,13 @@ class TranslateConverter(PDFConverterEx):
         Returns:
             List of character positions where word boundaries occur
         """
+        if not _THAI_RE.search(text):  # 无泰文字符，无需分词
+            return []
         try:
-            import pythainlp
+            import pythainlp  # noqa: F401
             # Use configurable engine for word segmentation
-            engine = ConfigManager.get("THAI_TOKENIZER_ENGINE", "newmm")
-            words = pythainlp.word_tokenize(text, engine=engine)
-            boundaries = []
-            pos = 0
-            for word in words:
-                pos += len(word)
-                boundaries.append(pos)
-
-            return boundaries
+            words = _tokenize_thai(text, self._thai_engine, self._thai_backend)
+            return list(itertools.accumulate(map(len, words)))
         except ImportError:
             log.warning("pythainlp not available, falling back to character-level wrapping")
             return []
@@ -305,7 +499,7 @@ class TranslateConverter(PDFConverterEx):
             log.warning(f"Error in Thai word segmentation: {e}")
             return []
 
-    def _find_safe_break_point(self, text: str, current_pos: int, target_lang: str, char_widths: List[float]) -> int:
+    def _find_safe_break_point(self, text: str, current_pos: int, target_lang: str, char_widths: List[float], boundaries: Optional[List[int]] = None) -> int:
         """
         Find a safe break point for text wrapping that respects word boundaries.
 
@@ -314,38 +508,52 @@ class TranslateConverter(PDFConverterEx):
             current_pos: Current character position where break is needed
             target_lang: Target language code (e.g., 'th' for Thai)
             char_widths: List of character widths up to current_pos
+            boundaries: Thai word boundaries of the whole text, from
+                _get_thai_word_boundaries; pass them when trying several break
+                positions in one paragraph so it is tokenized only once
 
         Returns:
             Safe break position (character index)
         """
-        # Check if Thai word wrapping is enabled
-        thai_word_wrap_enabled = ConfigManager.get("THAI_WORD_WRAP_ENABLED", "true").lower() == "true"
-
         # For Thai text, use word boundaries if enabled
-        if target_lang == 'th' and current_pos > 0 and thai_word_wrap_enabled:
-            boundaries = self._get_thai_word_boundaries(text[:current_pos])
-            if boundaries:
-                # Find the last word boundary before or at current position
-                safe_pos = max(b for b in boundaries if b <= current_pos)
-
-                # Make sure we don't break too early (configurable minimum line usage)
-                min_line_usage = float(ConfigManager.get("THAI_MIN_LINE_USAGE", "0.3"))
-                min_pos = max(1, int(current_pos * min_line_usage))
-                if safe_pos >= min_pos:
-                    return safe_pos
-
-        # Fallback: try to find space or punctuation near current position
-        for offset in range(min(10, current_pos)):
-            check_pos = current_pos - offset
-            if check_pos > 0 and check_pos < len(text):
-                char = text[check_pos]
-                if char in ' \t\n.,;:!?':
-                    log.debug(f"📝 Found safe break at punctuation/space: position {current_pos} -> {check_pos}")
-                    return check_pos
+        if target_lang == 'th' and current_pos > 0:
+            safe_pos = self._find_thai_break_point(text, current_pos, boundaries)
+            if safe_pos is not None:
+                return safe_pos
+
+        # Fallback: try to find space or punctuation within 10 characters before current position
+        lo = current_pos - min(10, current_pos) + 1
+        window = text[lo:min(current_pos + 1, len(text))]
+        offset = max(map(window.rfind, _BREAK_CHARS))  # 每个字符一次 C 层反向查找
+        if offset >= 0:
+            log.debug("📝 Found safe break at punctuation/space: position %d -> %d", current_pos, lo + offset)
+            return lo + offset
 
         # Last resort: break at current position
         return current_pos
 
+    def _find_thai_break_point(self, text: str, current_pos: int, boundaries: Optional[List[int]] = None):
+        """Last Thai word boundary at or before current_pos, or None if unusable."""
+        # Check if Thai word wrapping is enabled
+        if not self._thai_wrap_enabled:
+            return None
+        if boundaries is None:
+            boundaries = self._get_thai_word_boundaries(text[:current_pos])
+        i = bisect.bisect_right(boundaries, current_pos)
+        if not i:
+            return None
+        safe_pos = boundaries[i - 1]
+
+        # Make sure we don't break too early (configurable minimum line usage)
+        min_pos = max(1, int(current_pos * self._thai_min_usage))
+        return safe_pos if safe_pos >= min_pos else None
+
+    @staticmethod
+    def _find_last_zwsp_before(pos: int, positions: List[int]) -> int:
+        """Largest ZWSP offset in the sorted positions that is below pos, or -1."""
+        i = bisect.bisect_left(positions, pos)
+        return positions[i - 1] if i else -1
+
     def _calculate_text_width(self, text: str, font_name: str, font_size: float) -> float:
         """
         Calculate the total width of a text string.
@@ -358,21 +566,21 @@ class TranslateConverter(PDFConverterEx):
         Returns:
             Total text width
         """
-        total_width = 0.0
-        for char in text:
-            if char == '\u200B':  # Zero-width space has no width
-                width = 0.0
-            elif unicodedata.category(char) == 'Mn':  # Thai combining marks have no advance
-                width = 0.0
-                log.debug(f"🇹🇭 _calculate_text_width: Thai combining mark '{char}' set to 0.0pt")
-            elif font_name == self.noto_name and self.noto:
-                width = self.noto.char_lengths(char, font_size)[0]
-            elif hasattr(self, 'fontmap') and font_name in self.fontmap:
-                width = self.fontmap[font_name].char_width(ord(char)) * font_size
+        # 字宽与字号成正比，按字体对象缓存单位字宽（同一字体 ID 在不同页可能对应不同字体）
+        if font_name == self.noto_name and self.noto:
+            font = self.noto
+        else:
+            font = self.fontmap.get(font_name)
+        widths = self._unit_width_cache.get(font)
+        if widths is None:
+            if font is None:
+                widths = _UnitWidths(lambda char: 0.6)  # Rough estimate
+            elif font is self.noto:
+                widths = _UnitWidths(lambda char: font.char_lengths(char, 1)[0])
             else:
-                width = font_size * 0.6  # Rough estimate
-            total_width += width
-        return total_width
+                widths = _UnitWidths(lambda char: font.char_width(ord(char)))
+            self._unit_width_cache[font] = widths
+        return sum(map(widths.__getitem__, text)) * font_size
 
     def _add_thai_word_boundary_hints(self, text: str) -> str:
         """
@@ -384,55 +592,28 @@ class TranslateConverter(PDFConverterEx):
         Returns:
             Text with word boundary hints (zero-width spaces) inserted
         """
+        if not _THAI_RE.search(text):  # 无泰文字符，原样返回
+            return text
+
         # Check if Thai word wrapping is enabled
-        thai_word_wrap_enabled = ConfigManager.get("THAI_WORD_WRAP_ENABLED", "true").lower() == "true"
-        if not thai_word_wrap_enabled:
+        if not self._thai_wrap_enabled:
             return text
 
         try:
-            import pythainlp
-
-            # Preserve formula markers
-            formula_parts = []
-            working_text = text
-
-            # Extract and temporarily replace formula markers
-            formula_pattern = re.compile(r'\{v\d+\}')
-            for i, match in enumerate(formula_pattern.finditer(text)):
-                placeholder = f"__FORMULA_{i}__"
-                formula_parts.append((placeholder, match.group(0)))
-                working_text = working_text.replace(match.group(0), placeholder, 1)
-
-            # Process Thai text segments
-            segments = re.split(r'(__FORMULA_\d+__)', working_text)
-            processed_segments = []
-
-            for segment in segments:
-                if segment.startswith('__FORMULA_') and segment.endswith('__'):
-                    # Keep formula markers as-is
-                    processed_segments.append(segment)
-                elif segment and any(0x0E00 <= ord(ch) <= 0x0E7F for ch in segment):  # Contains Thai
-                    # Tokenize and add zero-width spaces at word boundaries
-                    engine = ConfigManager.get("THAI_TOKENIZER_ENGINE", "newmm")
-                    words = pythainlp.word_tokenize(segment, engine=engine)
-
-                    # Join with zero-width space (U+200B) for soft breaks
-                    processed_segment = '\u200B'.join(words)
-                    processed_segments.append(processed_segment)
-
-                    log.info(f"🇹🇭 Added word boundary hints: '{segment}' -> {len(words)} words")
-                else:
-                    # Non-Thai text, keep as-is
-                    processed_segments.append(segment)
+            import pythainlp  # noqa: F401
 
-            # Rejoin segments
-            result = ''.join(processed_segments)
+            # Split around formula markers; markers land on odd indices
+            segments = _VMARK_SPLIT_RE.split(text)
+            for i in range(0, len(segments), 2):
+                segment = segments[i]
+                if segment and _THAI_RE.search(segment):  # Contains Thai
+                    # Tokenize and add zero-width spaces at word boundaries
+                    words = _tokenize_thai(segment, self._thai_engine, self._thai_backend)
+                    segments[i] = '\u200B'.join(words)
 
-            # Restore formula markers
-            for placeholder, formula in formula_parts:
-                result = result.replace(placeholder, formula)
+                    log.debug("🇹🇭 Added word boundary hints: '%s' -> %d words", segment, len(words))
 
-            return result
+            return ''.join(segments)
 
         except ImportError:
             log.debug("pythainlp not available for Thai word boundary hints")
@@ -443,11 +624,13 @@ class TranslateConverter(PDFConverterEx):
 
     def receive_layout(self, ltpage: LTPage):
         # 段落
-        sstk: list[str] = []            # 段落文字栈
+        sstk: list[list[str]] = []      # 段落文字栈（按片段存放，结尾统一 join）
+        snws: list[int] = []            # 段落非空白字符数，等价于 len(sstk[-1].strip()) 的判定
         pstk: list[Paragraph] = []      # 段落属性栈
         vbkt: int = 0                   # 段落公式括号计数
         # 公式组
         vstk: list[LTChar] = []         # 公式符号组
+        vstk_x0: float = float("-inf")  # 公式符号组最大 x0
         vlstk: list[LTLine] = []        # 公式线条组
         vfix: float = 0                 # 公式纵向偏移
         # 公式组栈
@@ -463,63 +646,72 @@ class TranslateConverter(PDFConverterEx):
         ops: str = ""                   # 渲染结果
 
         def vflag(font: str, char: str):    # 匹配公式（和角标）字体
-            if isinstance(font, bytes):     # 不一定能 decode，直接转 str
-                try:
-                    font = font.decode('utf-8')  # 尝试使用 UTF-8 解码
-                except UnicodeDecodeError:
-                    font = ""
-            font = font.split("+")[-1]      # 字体名截断
-            if re.match(r"\(cid:", char):
+            # 基于字体名规则的判定，按字体缓存
+            font_v = self._vflag_font_cache.get(font)
+            if font_v is None:
+                font_key = font
+                if isinstance(font_key, bytes):     # 不一定能 decode，直接转 str
+                    try:
+                        font_key = font_key.decode('utf-8')  # 尝试使用 UTF-8 解码
+                    except UnicodeDecodeError:
+                        font_key = ""
+                font_key = font_key.split("+")[-1]  # 字体名截断
+                if self._re_vfont:
+                    font_v = bool(self._re_vfont.match(font_key))
+                else:
+                    font_v = bool(self._re_latex_font.match(font_key))  # latex 字体
+                self._vflag_font_cache[font] = font_v
+            if font_v:
+                return True
+            # ASCII 字母数字不可能命中默认字符集规则
+            if not self._re_vchar and char.isascii() and char.isalnum():
+                return False
+            if self._re_cid.match(char):
                 return True
-            # 基于字体名规则的判定
-            if self.vfont:
-                if re.match(self.vfont, font):
-                    return True
-            else:
-                if re.match(                                            # latex 字体
-                    r"(CM[^R]|MS.M|XY|MT|BL|RM|EU|LA|RS|LINE|LCIRCLE|TeX-|rsfs|txsy|wasy|stmary|.*Mono|.*Code|.*Ital|.*Sym|.*Math)",
-                    font,
-                ):
-                    return True
             # 基于字符集规则的判定
-            if self.vchar:
-                if re.match(self.vchar, char):
+            if self._re_vchar:
+                if self._re_vchar.match(char):
                     return True
-            else:
-                if (
-                    char
-                    and char != " "                                     # 非空格
-                    and (
-                        unicodedata.category(char[0])
-                        in ["Lm", "Mn", "Sk", "Sm", "Zl", "Zp", "Zs"]   # 文字修饰符、数学符号、分隔符号
-                        or ord(char[0]) in range(0x370, 0x400)          # 希腊字母
-                    )
-                ):
+            elif char and char != " ":                                  # 非空格
+                cp = ord(char[0])
+                if cp < 0x10000:
+                    if _MATH_CHARS[cp]:                                 # 文字修饰符、数学符号、分隔符号、希腊字母
+                        return True
+                elif unicodedata.category(char[0]) in _MARK_CATS:
                     return True
             return False
 
         ############################################################
         # A. 原文档解析
+        # 批量读取字符和线条在 layout 中的类别，并预先完成与栈状态无关的公式判定，按遍历顺序依次取用
+        items = [child for child in ltpage if isinstance(child, (LTChar, LTLine))]
+        if items:
+            layout = self.layout[ltpage.pageid]
+            # ltpage.height 可能是 fig 里面的高度，这里统一用 layout.shape
+            h, w = layout.shape
+            coords = np.array([(child.x0, child.y0) for child in items]).astype(np.intp)
+            np.clip(coords[:, 0], 0, w - 1, out=coords[:, 0])
+            np.clip(coords[:, 1], 0, h - 1, out=coords[:, 1])
+            cls_all = layout[coords[:, 1], coords[:, 0]]
+            chars = [child if isinstance(child, LTChar) else None for child in items]
+            texts = [child.get_text() if child is not None else "" for child in chars]
+            cls_all[np.array([text == "•" for text in texts], dtype=bool)] = 0      # 锚定文档中 bullet 的位置
+            fixed_v = (                                                                 # 与栈状态无关的公式判定
+                (cls_all == 0)                                                          # 1. 类别为保留区域
+                | np.array([                                                            # 3. 公式字体
+                    child is not None and vflag(child.fontname, text) for child, text in zip(chars, texts)
+                ], dtype=bool)
+                | np.array([                                                            # 4. 垂直字体
+                    child is not None and child.matrix[0] == 0 and child.matrix[3] == 0 for child in chars
+                ], dtype=bool)
+            )
+            cls_iter = zip(cls_all.tolist(), fixed_v.tolist())
         for child in ltpage:
             if isinstance(child, LTChar):
-                cur_v = False
-                layout = self.layout[ltpage.pageid]
-                # ltpage.height 可能是 fig 里面的高度，这里统一用 layout.shape
-                h, w = layout.shape
-                # 读取当前字符在 layout 中的类别
-                cx, cy = np.clip(int(child.x0), 0, w - 1), np.clip(int(child.y0), 0, h - 1)
-                cls = layout[cy, cx]
-                # 锚定文档中 bullet 的位置
-                if child.get_text() == "•":
-                    cls = 0
+                cls, cur_v = next(cls_iter)
                 # 判定当前字符是否属于公式
-                if (                                                                                        # 判定当前字符是否属于公式
-                    cls == 0                                                                                # 1. 类别为保留区域
-                    or (cls == xt_cls and len(sstk[-1].strip()) > 1 and child.size < pstk[-1].size * 0.79)  # 2. 角标字体，有 0.76 的角标和 0.799 的大写，这里用 0.79 取中，同时考虑首字母放大的情况
-                    or vflag(child.fontname, child.get_text())                                              # 3. 公式字体
-                    or (child.matrix[0] == 0 and child.matrix[3] == 0)                                      # 4. 垂直字体
-                ):
-                    cur_v = True
+                if not cur_v and cls == xt_cls and snws[-1] > 1 and child.size < pstk[-1].size * 0.79:
+                    cur_v = True            # 2. 角标字体，有 0.76 的角标和 0.799 的大写，这里用 0.79 取中，同时考虑首字母放大的情况
                 # 判定括号组是否属于公式
                 if not cur_v:
                     if vstk and child.get_text() == "(":
@@ -535,43 +727,50 @@ class TranslateConverter(PDFConverterEx):
                     # 禁止纯公式（代码）段落换行，直到文字开始再重开文字段落，保证只存在两种情况
                     # A. 纯公式（代码）段落（锚定绝对位置）sstk[-1]=="" -> sstk[-1]=="{v*}"
                     # B. 文字开头段落（排版相对位置）sstk[-1]!=""
-                    or (sstk[-1] != "" and abs(child.x0 - xt.x0) > vmax)    # 因为 cls==xt_cls==0 一定有 sstk[-1]==""，所以这里不需要再判定 cls!=0
+                    or (sstk[-1] and abs(child.x0 - xt.x0) > vmax)          # 因为 cls==xt_cls==0 一定有 sstk[-1]==""，所以这里不需要再判定 cls!=0
                 ):
                     if vstk:
                         if (                                                # 根据公式右侧的文字修正公式的纵向偏移
                             not cur_v                                       # 1. 当前字符不属于公式
                             and cls == xt_cls                               # 2. 当前字符与前一个字符属于同一段落
-                            and child.x0 > max([vch.x0 for vch in vstk])    # 3. 当前字符在公式右侧
+                            and child.x0 > vstk_x0                          # 3. 当前字符在公式右侧
                         ):
                             vfix = vstk[0].y0 - child.y0
-                        if sstk[-1] == "":
+                        if not sstk[-1]:
                             xt_cls = -1 # 禁止纯公式段落（sstk[-1]=="{v*}"）的后续连接，但是要考虑新字符和后续字符的连接，所以这里修改的是上个字符的类别
-                        sstk[-1] += f"{{v{len(var)}}}"
+                        vmark = f"{{v{len(var)}}}"
+                        sstk[-1].append(vmark)
+                        snws[-1] += len(vmark)
                         var.append(vstk)
                         varl.append(vlstk)
                         varf.append(vfix)
                         vstk = []
+                        vstk_x0 = float("-inf")
                         vlstk = []
                         vfix = 0
                 # 当前字符不属于公式或当前字符是公式的第一个字符
                 if not vstk:
                     if cls == xt_cls:               # 当前字符与前一个字符属于同一段落
                         if child.x0 > xt.x1 + 1:    # 添加行内空格
-                            sstk[-1] += " "
+                            sstk[-1].append(" ")
                         elif child.x1 < xt.x0:      # 添加换行空格并标记原文段落存在换行
-                            sstk[-1] += " "
+                            sstk[-1].append(" ")
                             pstk[-1].brk = True
                     else:                           # 根据当前字符构建一个新的段落
-                        sstk.append("")
+                        sstk.append([])
+                        snws.append(0)
                         pstk.append(Paragraph(child.y0, child.x0, child.x0, child.x0, child.y0, child.y1, child.size, False))
                 if not cur_v:                                               # 文字入栈
                     if (                                                    # 根据当前字符修正段落属性
                         child.size > pstk[-1].size                          # 1. 当前字符比段落字体大
-                        or len(sstk[-1].strip()) == 1                       # 2. 当前字符为段落第二个文字（考虑首字母放大的情况）
+                        or snws[-1] == 1                                    # 2. 当前字符为段落第二个文字（考虑首字母放大的情况）
                     ) and child.get_text() != " ":                          # 3. 当前字符不是空格
                         pstk[-1].y -= child.size - pstk[-1].size            # 修正段落初始纵坐标，假设两个不同大小字符的上边界对齐
                         pstk[-1].size = child.size
-                    sstk[-1] += child.get_text()
+                    text = child.get_text()
+                    if text:
+                        sstk[-1].append(text)
+                        snws[-1] += len(text) - sum(c.isspace() for c in text)
                 else:                                                       # 公式入栈
                     if (                                                    # 根据公式左侧的文字修正公式的纵向偏移
                         not vstk                                            # 1. 当前字符是公式的第一个字符
@@ -580,6 +779,7 @@ class TranslateConverter(PDFConverterEx):
                     ):
                         vfix = child.y0 - xt.y0
                     vstk.append(child)
+                    vstk_x0 = max(vstk_x0, child.x0)
                 # 更新段落边界，因为段落内换行之后可能是公式开头，所以要在外边处理
                 pstk[-1].x0 = min(pstk[-1].x0, child.x0)
                 pstk[-1].x1 = max(pstk[-1].x1, child.x1)
@@ -591,12 +791,7 @@ class TranslateConverter(PDFConverterEx):
             elif isinstance(child, LTFigure):   # 图表
                 pass
             elif isinstance(child, LTLine):     # 线条
-                layout = self.layout[ltpage.pageid]
-                # ltpage.height 可能是 fig 里面的高度，这里统一用 layout.shape
-                h, w = layout.shape
-                # 读取当前线条在 layout 中的类别
-                cx, cy = np.clip(int(child.x0), 0, w - 1), np.clip(int(child.y0), 0, h - 1)
-                cls = layout[cy, cx]
+                cls, _ = next(cls_iter)
                 if vstk and cls == xt_cls:      # 公式线条
                     vlstk.append(child)
                 else:                           # 全局线条
@@ -605,14 +800,16 @@ class TranslateConverter(PDFConverterEx):
                 pass
         # 处理结尾
         if vstk:    # 公式出栈
-            sstk[-1] += f"{{v{len(var)}}}"
+            sstk[-1].append(f"{{v{len(var)}}}")
             var.append(vstk)
             varl.append(vlstk)
             varf.append(vfix)
+        sstk = ["".join(parts) for parts in sstk]  # 段落片段合并为完整文字
         log.debug("\n==========[VSTACK]==========\n")
         for id, v in enumerate(var):  # 计算公式宽度
-            l = max([vch.x1 for vch in v]) - v[0].x0
-            log.debug(f'< {l:.1f} {v[0].x0:.1f} {v[0].y0:.1f} {v[0].cid} {v[0].fontname} {len(varl[id])} > v{id} = {"".join([ch.get_text() for ch in v])}')
+            l = max(vch.x1 for vch in v) - v[0].x0
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(f'< {l:.1f} {v[0].x0:.1f} {v[0].y0:.1f} {v[0].cid} {v[0].fontname} {len(varl[id])} > v{id} = {"".join([ch.get_text() for ch in v])}')
             vlen.append(l)
 
         ############################################################
@@ -620,22 +817,36 @@ class TranslateConverter(PDFConverterEx):
         log.debug("\n==========[SSTACK]==========\n")
 
         @retry(wait=wait_fixed(1))
-        def worker(s: str):  # 多线程翻译
-            if not s.strip() or re.match(r"^\{v\d+\}$", s):  # 空白和公式不翻译
-                return s
+        def worker(texts: List[str]):  # 多线程翻译，每个任务一批段落
             try:
-                new = self.translator.translate(s)
-                return new
+                try:
+                    return self.translator.translate_batch(texts)
+                except Exception as e:
+                    if len(texts) == 1:
+                        raise
+                    log.warning(f"Batch translation failed, retrying per paragraph: {e}")
+                    return [self.translator.translate(s) for s in texts]
             except BaseException as e:
                 if log.isEnabledFor(logging.DEBUG):
                     log.exception(e)
                 else:
                     log.exception(e, exc_info=False)
                 raise e
+        # 空白和公式不翻译；重复段落（本页或前几页已出现）只翻译一次
+        cache = self._page_trans_cache
+        unique = list(dict.fromkeys(
+            s for s in sstk
+            if s not in cache and s.strip() and not re.match(r"^\{v\d+\}$", s)
+        ))
+        # 按翻译服务的批量上限分块
+        batch_size = max(1, self.translator.batch_size)
+        batches = [unique[i:i + batch_size] for i in range(0, len(unique), batch_size)]
         with concurrent.futures.ThreadPoolExecutor(
             max_workers=self.thread
         ) as executor:
-            raw_news = list(executor.map(worker, sstk))
+            for batch, translated in zip(batches, executor.map(worker, batches)):
+                cache.update(zip(batch, translated))
+        raw_news = [cache.get(s, s) for s in sstk]
 
         # Post-process Thai text to add word boundary hints
         news = []
@@ -649,17 +860,26 @@ class TranslateConverter(PDFConverterEx):
 
         ############################################################
         # C. 新文档排版
-        def raw_string(fcur: str, cstk: str):  # 编码字符串
+        para_shape = None  # 当前段落的整段 HarfBuzz 塑形结果
+
+        def raw_string(fcur: str, cstk: str, start: int = None):  # 编码字符串，start 为 cstk 在段落译文中的起点
+            end = None if start is None else start + len(cstk)
             # Remove zero-width spaces before encoding - they're only for break hints
             cstk = cstk.replace('\u200B', '')
 
             if fcur == self.noto_name:
                 # Apply HarfBuzz shaping for Thai text to get proper glyph IDs
                 if (self.text_shaper.enabled
-                        and cstk and any(0x0E00 <= ord(ch) <= 0x0E7F for ch in cstk)):
+                        and cstk and _THAI_RE.search(cstk)):
+
+                    # Slice the glyphs of the already-shaped paragraph when possible
+                    if para_shape is not None and start is not None:
+                        gids = self._slice_paragraph_glyphs(para_shape, start, end)
+                        if gids:
+                            return struct.pack(f">{len(gids)}H", *gids).hex()
 
                     try:
-                        log.info(f"🇹🇭 GLYPH SHAPING: '{cstk}' with HarfBuzz")
+                        log.debug("🇹🇭 GLYPH SHAPING: '%s' with HarfBuzz", cstk)
 
                         # Get font path and shape text
                         font_path = self._get_font_path(fcur)
@@ -669,91 +889,59 @@ class TranslateConverter(PDFConverterEx):
 
                             if shaped and shaped.success:
                                 # Use HarfBuzz glyph IDs instead of default glyph lookup
-                                glyph_codes = []
-                                for glyph in shaped.glyphs:
-                                    glyph_codes.append("%04x" % glyph.glyph_id)
+                                gids = [glyph.glyph_id for glyph in shaped.glyphs]
 
-                                log.info(f"✅ HarfBuzz glyphs: {len(glyph_codes)} glyphs")
-                                return "".join(glyph_codes)
+                                log.debug("✅ HarfBuzz glyphs: %d glyphs", len(gids))
+                                return struct.pack(f">{len(gids)}H", *gids).hex()
                             else:
                                 log.debug("❌ HarfBuzz shaping failed, using fallback")
 
                     except Exception as e:
                         log.warning(f"⚠️ Error in glyph shaping: {e}")
 
-                # Fallback to original glyph lookup
-                return "".join(["%04x" % self.noto.has_glyph(ord(c)) for c in cstk])
+                # Fallback to original glyph lookup, big-endian uint16 glyph IDs
+                cache = self._gid_cache
+                gids = []
+                for c in cstk:
+                    cp = ord(c)
+                    g = cache.get(cp)
+                    if g is None:
+                        g = cache[cp] = self.noto.has_glyph(cp)
+                    gids.append(g)
+                return struct.pack(f">{len(gids)}H", *gids).hex()
 
             elif isinstance(self.fontmap[fcur], PDFCIDFont):  # 判断编码长度
-                return "".join(["%04x" % ord(c) for c in cstk])
+                return cstk.encode("utf-16-be", "surrogatepass").hex()
             else:
                 return "".join(["%02x" % ord(c) for c in cstk])
 
-        # 根据目标语言获取默认行距
-        LANG_LINEHEIGHT_MAP = {
-            "zh-cn": 1.4, "zh-tw": 1.4, "zh-hans": 1.4, "zh-hant": 1.4, "zh": 1.4,
-            "ja": 1.1, "ko": 1.2, "en": 1.2, "ar": 1.0, "ru": 0.8, "uk": 0.8, "ta": 0.8,
-            "th": 1.5  # Increased line spacing for Thai
-        }
-
-        # Check for custom line height from environment/config
-        target_lang = self.translator.lang_out.lower()
-        env_line_height_key = f"LANG_LINEHEIGHT_{target_lang.upper().replace('-', '_')}"
-        custom_line_height = ConfigManager.get(env_line_height_key)
-
-        log.info(f"🔍 DEBUG: Checking line height for language '{target_lang}'")
-        log.info(f"🔍 DEBUG: Looking for config key: {env_line_height_key}")
-        log.info(f"🔍 DEBUG: Config value found: {custom_line_height}")
-
-        if custom_line_height:
-            try:
-                default_line_height = float(custom_line_height)
-                log.info(f"✅ DEBUG: Using custom line height: {default_line_height}")
-            except (ValueError, TypeError):
-                default_line_height = LANG_LINEHEIGHT_MAP.get(target_lang, 1.1)
-                log.warning(f"⚠️  DEBUG: Invalid line height value, using default: {default_line_height}")
-        else:
-            default_line_height = LANG_LINEHEIGHT_MAP.get(target_lang, 1.1) # 小语种默认1.1
-            log.info(f"📝 DEBUG: No custom line height, using default: {default_line_height}")
-
-        # 根据目标语言获取字体大小缩放比例
-        LANG_FONTSIZE_SCALE = {
-            "th": 0.7,  # Reduce Thai font size to 90%
-        }
+        _x, _y = 0, 0
+        ops_list = []
 
-        # Check for custom font size scale from environment/config
-        env_fontsize_key = f"LANG_FONTSIZE_SCALE_{target_lang.upper().replace('-', '_')}"
-        custom_font_scale = ConfigManager.get(env_fontsize_key)
+        font_size_scale = self._font_size_scale
 
-        log.info(f"🔍 DEBUG: Checking font scale for language '{target_lang}'")
-        log.info(f"🔍 DEBUG: Looking for config key: {env_fontsize_key}")
-        log.info(f"🔍 DEBUG: Config value found: {custom_font_scale}")
+        # 码位的字体与单位字宽缓存 {码位: (字体 ID, 字号为 1 时的宽度)}，tiro 字体对象变化时重建
+        tiro = self.fontmap.get("tiro")
+        if tiro is not self._tiro_font:
+            self._tiro_font = tiro
+            self._tiro_cache = {}
+        tiro_cache = self._tiro_cache
 
-        if custom_font_scale:
-            try:
-                font_size_scale = float(custom_font_scale)
-                log.info(f"✅ DEBUG: Using custom font scale: {font_size_scale}")
-            except (ValueError, TypeError):
-                font_size_scale = LANG_FONTSIZE_SCALE.get(target_lang, 1.0)
-                log.warning(f"⚠️  DEBUG: Invalid font scale value, using default: {font_size_scale}")
+        op_txt = self._op_txt_fmt
+        if font_size_scale == 1.0:  # 无缩放时直接使用模板
+            gen_op_txt = op_txt
         else:
-            font_size_scale = LANG_FONTSIZE_SCALE.get(target_lang, 1.0)
-            log.info(f"📝 DEBUG: No custom font scale, using default: {font_size_scale}")
-
-        log.info(f"🎨 DEBUG: Final settings - Font Scale: {font_size_scale}, Line Height: {default_line_height}")
+            def gen_op_txt(font, size, x, y, rtxt):
+                return op_txt(font, size * font_size_scale, x, y, rtxt)
 
-        _x, _y = 0, 0
-        ops_list = []
-
-        def gen_op_txt(font, size, x, y, rtxt):
-            scaled_size = size * font_size_scale
-            if font_size_scale != 1.0:
-                log.debug(f"📏 DEBUG: Scaling font from {size:.2f} to {scaled_size:.2f} (scale: {font_size_scale})")
-
-            return f"/{font} {scaled_size:f} Tf 1 0 0 1 {x:f} {y:f} Tm [<{rtxt}>] TJ "
+        op_line = self._op_line_fmt
 
         def gen_op_line(x, y, xlen, ylen, linewidth):
-            return f"ET q 1 0 0 1 {x:f} {y:f} cm [] 0 d 0 J {linewidth:f} w 0 0 m {xlen:f} {ylen:f} l S Q BT "
+            return op_line(x, y, linewidth, xlen, ylen)
+
+        # 含泰文的段落按文字系统合批塑形，逐段塑形时命中缓存
+        if self.text_shaper.enabled:
+            self._prefetch_paragraph_shapes([new for new in news if _THAI_RE.search(new)])
 
         for id, new in enumerate(news):
             x: float = pstk[id].x                       # 段落初始横坐标
@@ -769,183 +957,73 @@ class TranslateConverter(PDFConverterEx):
             tx = x
             fcur_ = fcur
             ptr = 0
-            log.debug(f"< {y} {x} {x0} {x1} {size} {brk} > {sstk[id]} | {new}")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("< %s %s %s %s %s %s > %s | %s", y, x, x0, x1, size, brk, sstk[id], new)
+
+            # 排版指令 (OpType.TEXT, font, size, x, dy, rtxt, lidx) 或 (OpType.LINE, x, dy, xlen, ylen, linewidth, lidx)
+            ops_vals: list[tuple] = []
 
-            ops_vals: list[dict] = []
+            # 含泰文的段落整体塑形一次，raw_string 按字符区间切取字形
+            para_shape = None
+            if self.text_shaper.enabled and _THAI_RE.search(new):
+                para_shape = self._shape_paragraph(new)
+            cstart = 0                                  # 当前文字栈在 new 中的起点
+
+            # 预先一次性定位 {vn} 公式标记 {起点: (终点, 编号)}
+            markers = {m.start(): (m.end(), m.group(1)) for m in _VMARK_RE.finditer(new)}
+            # 零宽空格词界位置，换行时二分查找（文字栈恒为 new[cstart:cstart+len(cstk)]）
+            zwsps = [m.start() for m in _WORD_HINT_RE.finditer(new)]
 
             while ptr < len(new):
-                vy_regex = re.match(
-                    r"\{\s*v([\d\s]+)\}", new[ptr:], re.IGNORECASE
-                )  # 匹配 {vn} 公式标记
+                marker = markers.get(ptr)  # 匹配 {vn} 公式标记
+                vy_regex = marker is not None
                 mod = 0  # 文字修饰符
 
                 # Calculate scaled font size for line width calculations (needed for both text and formula processing)
                 scaled_size_for_width = size * font_size_scale
                 if vy_regex:  # 加载公式
-                    ptr += len(vy_regex.group(0))
+                    ptr, vnum = marker
                     try:
-                        vid = int(vy_regex.group(1).replace(" ", ""))
+                        vid = int(vnum.replace(" ", ""))
                         adv = vlen[vid]
                     except Exception:
-                        continue  # 翻译器可能会自动补个越界的公式标记
+                        # 翻译器可能会自动补个越界的公式标记，跳过前先输出文字栈，保证 cstk 与 new[cstart:] 连续
+                        if cstk:
+                            ops_vals.append((OpType.TEXT, fcur, size, tx, 0, raw_string(fcur, cstk, cstart), lidx))
+                            cstk = ""
+                        continue
                     if var[vid][-1].get_text() and unicodedata.category(var[vid][-1].get_text()[0]) in ["Lm", "Mn", "Sk"]:  # 文字修饰符
                         mod = var[vid][-1].width
                 else:  # 加载文字 - Process text with complex script support
                     ch = new[ptr]
-                    fcur_ = None
-                    try:
-                        if self.fontmap["tiro"].to_unichr(ord(ch)) == ch:
-                            fcur_ = "tiro"  # 默认拉丁字体
-                    except Exception:
-                        pass
-                    if fcur_ is None:
-                        fcur_ = self.noto_name  # 默认非拉丁字体
-
-                    # Try complex text processing for Thai and other complex scripts (temporarily disabled - causes layout issues)
-                    if False and fcur_ == self.noto_name and self.text_shaper.enabled and ptr < len(new):
-                        # Collect the LONGEST possible text run for optimal shaping
-                        text_run = ch
-                        lookahead_ptr = ptr + 1
-
-                        # Aggressively collect characters - shape entire sentences when possible
-                        # Only stop for: formula markers, font changes, or end of text
-                        while lookahead_ptr < len(new):
-                            # Check for formula marker
-                            if re.match(r"\{\s*v([\d\s]+)\}", new[lookahead_ptr:], re.IGNORECASE):
-                                break
-
-                            next_ch = new[lookahead_ptr]
-                            next_fcur = None
-                            try:
-                                if self.fontmap["tiro"].to_unichr(ord(next_ch)) == next_ch:
-                                    next_fcur = "tiro"
-                            except Exception:
-                                pass
-                            if next_fcur is None:
-                                next_fcur = self.noto_name
-
-                            # Stop if font changes
-                            if next_fcur != fcur_:
-                                break
-
-                            text_run += next_ch
-                            lookahead_ptr += 1
-
-                        # Check if this text run contains complex scripts that need shaping
-                        if self.text_shaper._needs_shaping(text_run):
-                            # Process the entire run with HarfBuzz - this enables proper contextual shaping
-                            glyphs = self._shape_text_run(text_run, fcur_, size, scaled_size_for_width)
-
-                            log.debug(f"🔤 Processing complex script sentence: '{text_run}' ({len(text_run)} chars) -> {len(glyphs)} glyphs")
-
-                            # Log raw glyph advance data for debugging
-                            total_raw_advance = sum(g['x_advance'] for g in glyphs)
-                            log.info(f"🔍 Raw HarfBuzz total advance: {total_raw_advance:.2f}pt")
-
-                            # Generate text operations using cluster-based rendering
-                            # Group glyphs by cluster to render complete character units
-                            clusters = {}
-                            total_advance = 0.0
-
-                            # Group glyphs by cluster
-                            for glyph in glyphs:
-                                cluster = glyph['cluster']
-                                if cluster not in clusters:
-                                    clusters[cluster] = {
-                                        'chars': '',
-                                        'base_advance': 0.0,
-                                        'x_offset': 0.0,
-                                        'y_offset': 0.0,
-                                        'char_indices': []
-                                    }
-
-                                char_idx = glyph['char_index']
-                                if char_idx < len(text_run):
-                                    char = text_run[char_idx]
-
-                                    # Build complete character string for this cluster
-                                    if char_idx not in clusters[cluster]['char_indices']:
-                                        clusters[cluster]['chars'] += char
-                                        clusters[cluster]['char_indices'].append(char_idx)
-
-                                    # Track the main advance (from base characters)
-                                    char_category = unicodedata.category(char)
-                                    if char_category not in ['Mn', 'Mc', 'Me']:  # Not a combining mark
-                                        clusters[cluster]['base_advance'] += glyph['x_advance']
-                                        log.debug(f"🔤 Adding advance: '{char}' ({char_category}) +{glyph['x_advance']:.2f}pt")
-                                    else:
-                                        log.debug(f"🔤 Skipping combining mark advance: '{char}' ({char_category}) {glyph['x_advance']:.2f}pt")
-
-                                    # Use positioning from the first glyph in cluster for offset
-                                    if len(clusters[cluster]['char_indices']) == 1:
-                                        clusters[cluster]['x_offset'] = glyph['x_offset']
-                                        clusters[cluster]['y_offset'] = glyph['y_offset']
-
-                            # Generate one text operation per cluster
-                            current_x = x
-                            for cluster_id in sorted(clusters.keys()):
-                                cluster_data = clusters[cluster_id]
-
-                                if cluster_data['chars']:
-                                    # Position the complete cluster
-                                    cluster_x = current_x + cluster_data['x_offset']
-                                    cluster_y = cluster_data['y_offset']
-
-                                    # Create single text operation for the complete character cluster
-                                    text_op = {
-                                        "type": OpType.TEXT,
-                                        "font": fcur_,
-                                        "size": size,
-                                        "x": cluster_x,
-                                        "dy": cluster_y,
-                                        "rtxt": raw_string(fcur_, cluster_data['chars']),
-                                        "lidx": lidx
-                                    }
-                                    ops_vals.append(text_op)
-
-                
-                                    log.debug(f"🔤 Cluster {cluster_id}: '{cluster_data['chars']}' at x={cluster_x:.2f}, y_offset={cluster_y:.2f}, advance={cluster_data['base_advance']:.2f}")
-
-                                    # Advance to next cluster position
-                                    current_x += cluster_data['base_advance']
-                                    total_advance += cluster_data['base_advance']
-
-                            # Update main x position and pointer
-                            log.info(f"🇹🇭 HarfBuzz total advance: {total_advance:.2f}pt for '{text_run}'")
-                            x = current_x
-                            ptr = lookahead_ptr  # Skip past the processed run
-                            adv = 0  # No additional advancement needed
-                            fcur = fcur_
-
-                            # Clear text buffer since we processed the run directly
-                            cstk = ""
-                            continue
+                    cp = ord(ch)
+                    cached = tiro_cache.get(cp)
+                    if cached is None:
+                        try:
+                            is_tiro = self.fontmap["tiro"].to_unichr(cp) == ch
+                        except Exception:
+                            is_tiro = False
+                        if is_tiro:
+                            cached = tiro_cache[cp] = ("tiro", self.fontmap["tiro"].char_width(cp))
+                        else:
+                            cached = tiro_cache[cp] = (self.noto_name, self.noto.char_lengths(ch, 1)[0])
+                    fcur_, unit_adv = cached  # 默认拉丁字体，否则默认非拉丁字体
 
                     # Standard character processing (fallback or non-complex scripts)
-                    if fcur_ == self.noto_name:
-                        adv = self.noto.char_lengths(ch, scaled_size_for_width)[0]
-                        if 0x0E00 <= ord(ch) <= 0x0E7F:  # Thai characters
-                            log.info(f"🔢 Thai width: '{ch}' = {adv:.2f}pt")
-                    else:
-                        adv = self.fontmap[fcur_].char_width(ord(ch)) * scaled_size_for_width
-                        if 0x0E00 <= ord(ch) <= 0x0E7F:  # Thai characters
-                            log.info(f"🔢 Thai width: '{ch}' = {adv:.2f}pt")
+                    adv = unit_adv * scaled_size_for_width
+                    if log.isEnabledFor(logging.DEBUG) and 0x0E00 <= ord(ch) <= 0x0E7F:  # Thai characters
+                        log.debug("🔢 Thai width: '%s' = %.2fpt", ch, adv)
 
                     # Handle special characters that should have no advance width
                     if ch == '\u200B':  # Zero-width space should have no advance
                         adv = 0
                     elif ch == '|':  # DEBUG: | used as visible ZWSP replacement
                         adv = 0
-                    elif unicodedata.category(ch) == 'Mn':  # Thai combining marks (tone marks, vowels)
+                    elif _is_nonspacing(ch):  # Thai combining marks (tone marks, vowels)
                         original_adv = adv
                         adv = 0  # Combining marks should not advance the cursor
-                        log.info(f"🇹🇭 Combining mark: '{ch}' {original_adv:.1f}pt -> {adv:.1f}pt")
-
-                    if font_size_scale != 1.0:
-                        if fcur_ == self.noto_name:
-                            original_adv = self.noto.char_lengths(ch, size)[0]
-                        else:
-                            original_adv = self.fontmap[fcur_].char_width(ord(ch)) * size
+                        if log.isEnabledFor(logging.DEBUG):
+                            log.debug("🇹🇭 Combining mark: '%s' %.1fpt -> %.1fpt", ch, original_adv, adv)
 
                     ptr += 1
                 # Check for line wrapping
@@ -956,14 +1034,10 @@ class TranslateConverter(PDFConverterEx):
                     should_wrap = True
 
                     # Check if we can break at a better position (ZWSP for Thai word boundaries)
-                    if '\u200B' in cstk:
-                        last_zwsp = cstk.rfind('\u200B')
-                        if last_zwsp >= 0:  # Found a break point
-                            prefer_break_at_pipe = True
-                        else:
-                            pass
-                    else:
-                        pass
+                    last_zwsp = self._find_last_zwsp_before(cstart + len(cstk), zwsps) - cstart
+                    # Only break on a ZWSP that really is inside the text buffer
+                    if last_zwsp >= 0 and cstk[last_zwsp:last_zwsp + 1] == '\u200B':
+                        prefer_break_at_pipe = True
 
                 if (                                # 输出文字缓冲区
                     fcur_ != fcur                   # 1. 字体更新
@@ -971,20 +1045,11 @@ class TranslateConverter(PDFConverterEx):
                     or (should_wrap and not prefer_break_at_pipe)  # 3. 到达右边界但不是优选断点
                 ):
                     if cstk:
-                        ops_vals.append({
-                            "type": OpType.TEXT,
-                            "font": fcur,
-                            "size": size,
-                            "x": tx,
-                            "dy": 0,
-                            "rtxt": raw_string(fcur, cstk),
-                            "lidx": lidx
-                        })
+                        ops_vals.append((OpType.TEXT, fcur, size, tx, 0, raw_string(fcur, cstk, cstart), lidx))
                         cstk = ""
 
                 # Handle preferred ZWSP break points
                 elif prefer_break_at_pipe and cstk:
-                    last_zwsp = cstk.rfind('\u200B')
                     if last_zwsp >= 0:
                         # Split at the ZWSP position
                         safe_text = cstk[:last_zwsp + 1]  # Include the ZWSP
@@ -992,28 +1057,22 @@ class TranslateConverter(PDFConverterEx):
 
 
                         # Output safe portion
-                        ops_vals.append({
-                            "type": OpType.TEXT,
-                            "font": fcur,
-                            "size": size,
-                            "x": tx,
-                            "dy": 0,
-                            "rtxt": raw_string(fcur, safe_text),
-                            "lidx": lidx
-                        })
+                        ops_vals.append((OpType.TEXT, fcur, size, tx, 0, raw_string(fcur, safe_text, cstart), lidx))
 
                         # Start new line with remaining text only
                         x = x0
                         lidx += 1
                         tx = x0  # Wrapped text starts at beginning of new line
                         cstk = remaining_text
+                        cstart += last_zwsp + 1
                         should_wrap = False
 
                         # Calculate the width that the wrapped text will consume
                         if remaining_text:
                             wrapped_width = self._calculate_text_width(remaining_text, fcur, size)
                             x = x0 + wrapped_width  # Update x position after wrapped text
-                            log.info(f"🔄 Wrapped text: '{remaining_text}' width={wrapped_width:.1f}pt, x={x0:.1f} -> {x:.1f}")
+                            if log.isEnabledFor(logging.DEBUG):
+                                log.debug("🔄 Wrapped text: '%s' width=%.1fpt, x=%.1f -> %.1f", remaining_text, wrapped_width, x0, x)
 
                         # Check if current character is already first in remaining text
                         if remaining_text and remaining_text[0] == ch:
@@ -1029,34 +1088,23 @@ class TranslateConverter(PDFConverterEx):
                     fix = 0
                     if fcur is not None:  # 段落内公式修正纵向偏移
                         fix = varf[vid]
+                    # 公式内各元素相对公式首字符的平移量，循环内不变
+                    vdx = x - var[vid][0].x0
+                    vdy = fix - var[vid][0].y0
+                    debug = log.isEnabledFor(logging.DEBUG)
                     for vch in var[vid]:  # 排版公式字符
-                        vc = chr(vch.cid)
-                        ops_vals.append({
-                            "type": OpType.TEXT,
-                            "font": self.fontid[vch.font],
-                            "size": vch.size,
-                            "x": x + vch.x0 - var[vid][0].x0,
-                            "dy": fix + vch.y0 - var[vid][0].y0,
-                            "rtxt": raw_string(self.fontid[vch.font], vc),
-                            "lidx": lidx
-                        })
-                        if log.isEnabledFor(logging.DEBUG):
-                            lstk.append(LTLine(0.1, (_x, _y), (x + vch.x0 - var[vid][0].x0, fix + y + vch.y0 - var[vid][0].y0)))
-                            _x, _y = x + vch.x0 - var[vid][0].x0, fix + y + vch.y0 - var[vid][0].y0
+                        vfont = self.fontid[vch.font]
+                        ops_vals.append((OpType.TEXT, vfont, vch.size, vch.x0 + vdx, vch.y0 + vdy, raw_string(vfont, chr(vch.cid)), lidx))
+                        if debug:
+                            lstk.append(LTLine(0.1, (_x, _y), (vch.x0 + vdx, y + vch.y0 + vdy)))
+                            _x, _y = vch.x0 + vdx, y + vch.y0 + vdy
                     for l in varl[vid]:  # 排版公式线条
                         if l.linewidth < 5:  # hack 有的文档会用粗线条当图片背景
-                            ops_vals.append({
-                                "type": OpType.LINE,
-                                "x": l.pts[0][0] + x - var[vid][0].x0,
-                                "dy": l.pts[0][1] + fix - var[vid][0].y0,
-                                "linewidth": l.linewidth,
-                                "xlen": l.pts[1][0] - l.pts[0][0],
-                                "ylen": l.pts[1][1] - l.pts[0][1],
-                                "lidx": lidx
-                            })
+                            ops_vals.append((OpType.LINE, l.pts[0][0] + vdx, l.pts[0][1] + vdy, l.pts[1][0] - l.pts[0][0], l.pts[1][1] - l.pts[0][1], l.linewidth, lidx))
                 else:  # 插入文字缓冲区
                     if not cstk:  # 单行开头
                         tx = x
+                        cstart = ptr - 1
                         if x == x0 and (ch == " " or ch == '\u200B'):  # 消除段落换行空格和ZWSP
                             adv = 0
                         cstk += ch
@@ -1064,10 +1112,10 @@ class TranslateConverter(PDFConverterEx):
                         cstk += ch
                 adv -= mod # 文字修饰符
                 fcur = fcur_
-                if adv != 0:  # Only log non-zero advances to reduce noise
+                if adv != 0 and log.isEnabledFor(logging.DEBUG):  # Only log non-zero advances to reduce noise
                     # ch might be undefined in ZWSP breaking scenarios, so use safe logging
                     char_info = locals().get('ch', '[formula/unknown]')
-                    log.debug(f"📍 Char advance: '{char_info}' x={x:.2f}pt +{adv:.2f}pt = {x + adv:.2f}pt")
+                    log.debug("📍 Char advance: '%s' x=%.2fpt +%.2fpt = %.2fpt", char_info, x, adv, x + adv)
                 x += adv
                 if log.isEnabledFor(logging.DEBUG):
                     lstk.append(LTLine(0.1, (_x, _y), (x, y)))
@@ -1075,37 +1123,35 @@ class TranslateConverter(PDFConverterEx):
             # 处理结尾
             if cstk:
                 # Log total width for Thai text segments
-                if any(0x0E00 <= ord(c) <= 0x0E7F for c in cstk):
+                if log.isEnabledFor(logging.DEBUG) and _THAI_RE.search(cstk):
                     total_thai_width = self._calculate_text_width(cstk, fcur, size)
                     base_chars = len([c for c in cstk if unicodedata.category(c) not in ['Mn', 'Mc', 'Me']])
-                    log.info(f"📊 Thai text summary: '{cstk}' width={total_thai_width:.1f}pt, base_chars={base_chars}, expected={base_chars * size * 0.6:.1f}pt")
-
-                ops_vals.append({
-                    "type": OpType.TEXT,
-                    "font": fcur,
-                    "size": size,
-                    "x": tx,
-                    "dy": 0,
-                    "rtxt": raw_string(fcur, cstk),
-                    "lidx": lidx
-                })
-
-            line_height = default_line_height
+                    log.debug("📊 Thai text summary: '%s' width=%.1fpt, base_chars=%d, expected=%.1fpt", cstk, total_thai_width, base_chars, base_chars * size * 0.6)
+
+                ops_vals.append((OpType.TEXT, fcur, size, tx, 0, raw_string(fcur, cstk, cstart), lidx))
+
+            line_height = self._line_height
             original_line_height = line_height
 
-            while (lidx + 1) * size * line_height > height and line_height >= 1:
-                line_height -= 0.05
+            rows = lidx + 1
+            if rows * size * line_height > height and line_height >= 1:
+                # 行距按 0.05 递减到恰好放得下内容，但不低于 1，直接算出递减次数
+                steps = math.ceil((line_height - height / (rows * size)) / 0.05 - 1e-9)
+                line_height = max(1.0, line_height - 0.05 * steps)
 
             if line_height != original_line_height:
-                log.debug(f"📐 DEBUG: Line height auto-adjusted from {original_line_height:.2f} to {line_height:.2f} to fit content")
+                log.debug("📐 DEBUG: Line height auto-adjusted from %.2f to %.2f to fit content", original_line_height, line_height)
             else:
-                log.debug(f"📐 DEBUG: Using line height: {line_height:.2f}")
-
-            for vals in ops_vals:
-                if vals["type"] == OpType.TEXT:
-                    ops_list.append(gen_op_txt(vals["font"], vals["size"], vals["x"], vals["dy"] + y - vals["lidx"] * size * line_height, vals["rtxt"]))
-                elif vals["type"] == OpType.LINE:
-                    ops_list.append(gen_op_line(vals["x"], vals["dy"] + y - vals["lidx"] * size * line_height, vals["xlen"], vals["ylen"], vals["linewidth"]))
+                log.debug("📐 DEBUG: Using line height: %.2f", line_height)
+
+            # 每行基线纵坐标，lidx 只增不减，最终值即最大行号
+            line_y = [y - i * size * line_height for i in range(lidx + 1)]
+            ops_list.extend(
+                gen_op_txt(v[1], v[2], v[3], v[4] + line_y[v[6]], v[5])
+                if v[0] is OpType.TEXT else
+                gen_op_line(v[1], v[2] + line_y[v[6]], v[3], v[4], v[5])
+                for v in ops_vals
+            )
 
         for l in lstk:  # 排版全局线条
             if l.linewidth < 5:  # hack 有的文档会用粗线条当图片背景
@@ -1,6 +1,7 @@
 """Functions that can be used for the most common use-cases for pdf2zh.six"""
 
 import asyncio
+import concurrent.futures
 import io
 import os
 import re
@@ -31,6 +32,10 @@ from babeldoc.assets.assets import get_font_and_metadata
 
 NOTO_NAME = "noto"
 
+# 版面识别预取的页数与推理线程数
+LAYOUT_PREFETCH_PAGES = 4
+LAYOUT_WORKERS = 2
+
 logger = logging.getLogger(__name__)
 
 noto_list = [
@@ -67,6 +72,35 @@ def check_files(files: List[str]) -> List[str]:
     return missing_files
 
 
+def page_layout_box(model: OnnxModel, image: np.ndarray) -> np.ndarray:
+    page_layout = model.predict(image, imgsz=int(image.shape[0] / 32) * 32)[0]
+    # kdtree 是不可能 kdtree 的，不如直接渲染成图片，用空间换时间
+    box = np.ones(image.shape[:2])
+    h, w = box.shape
+    vcls = ["abandon", "figure", "table", "isolate_formula", "formula_caption"]
+    for i, d in enumerate(page_layout.boxes):
+        if page_layout.names[int(d.cls)] not in vcls:
+            x0, y0, x1, y1 = d.xyxy.squeeze()
+            x0, y0, x1, y1 = (
+                np.clip(int(x0 - 1), 0, w - 1),
+                np.clip(int(h - y1 - 1), 0, h - 1),
+                np.clip(int(x1 + 1), 0, w - 1),
+                np.clip(int(h - y0 + 1), 0, h - 1),
+            )
+            box[y0:y1, x0:x1] = i + 2
+    for i, d in enumerate(page_layout.boxes):
+        if page_layout.names[int(d.cls)] in vcls:
+            x0, y0, x1, y1 = d.xyxy.squeeze()
+            x0, y0, x1, y1 = (
+                np.clip(int(x0 - 1), 0, w - 1),
+                np.clip(int(h - y1 - 1), 0, h - 1),
+                np.clip(int(x1 + 1), 0, w - 1),
+                np.clip(int(h - y0 + 1), 0, h - 1),
+            )
+            box[y0:y1, x0:x1] = 0
+    return box
+
+
 def translate_patch(
     inf: BinaryIO,
     pages: Optional[list[int]] = None,
@@ -115,7 +149,36 @@ def translate_patch(
 
     parser = PDFParser(inf)
     doc = PDFDocument(parser)
-    with tqdm.tqdm(total=total_pages) as progress:
+    # 版面识别与页面解析流水线：主线程渲染后续页面，onnxruntime 推理在线程池中进行
+    if pages:
+        # 超出文档页数的页码不会被解析，也不预取
+        pagenos = iter(p for p in sorted(set(pages)) if p < doc_zh.page_count)
+    else:
+        pagenos = iter(range(doc_zh.page_count))
+    pending = {}
+
+    def render(pageno: int) -> np.ndarray:
+        pix = doc_zh[pageno].get_pixmap()
+        return np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width, 3)[
+            :, :, ::-1
+        ]
+
+    def next_layout(pageno: int) -> np.ndarray:
+        while len(pending) < LAYOUT_PREFETCH_PAGES:
+            prefetch = next(pagenos, None)
+            if prefetch is None:
+                break
+            pending[prefetch] = executor.submit(
+                page_layout_box, model, render(prefetch)
+            )
+        if pageno not in pending:
+            return page_layout_box(model, render(pageno))
+        return pending.pop(pageno).result()
+
+    with (
+        concurrent.futures.ThreadPoolExecutor(max_workers=LAYOUT_WORKERS) as executor,
+        tqdm.tqdm(total=total_pages) as progress,
+    ):
         for pageno, page in enumerate(PDFPage.create_pages(doc)):
             if cancellation_event and cancellation_event.is_set():
                 raise CancelledError("task cancelled")
@@ -125,36 +188,7 @@ def translate_patch(
             if callback:
                 callback(progress)
             page.pageno = pageno
-            pix = doc_zh[page.pageno].get_pixmap()
-            image = np.frombuffer(pix.samples, np.uint8).reshape(
-                pix.height, pix.width, 3
-            )[:, :, ::-1]
-            page_layout = model.predict(image, imgsz=int(pix.height / 32) * 32)[0]
-            # kdtree 是不可能 kdtree 的，不如直接渲染成图片，用空间换时间
-            box = np.ones((pix.height, pix.width))
-            h, w = box.shape
-            vcls = ["abandon", "figure", "table", "isolate_formula", "formula_caption"]
-            for i, d in enumerate(page_layout.boxes):
-                if page_layout.names[int(d.cls)] not in vcls:
-                    x0, y0, x1, y1 = d.xyxy.squeeze()
-                    x0, y0, x1, y1 = (
-                        np.clip(int(x0 - 1), 0, w - 1),
-                        np.clip(int(h - y1 - 1), 0, h - 1),
-                        np.clip(int(x1 + 1), 0, w - 1),
-                        np.clip(int(h - y0 + 1), 0, h - 1),
-                    )
-                    box[y0:y1, x0:x1] = i + 2
-            for i, d in enumerate(page_layout.boxes):
-                if page_layout.names[int(d.cls)] in vcls:
-                    x0, y0, x1, y1 = d.xyxy.squeeze()
-                    x0, y0, x1, y1 = (
-                        np.clip(int(x0 - 1), 0, w - 1),
-                        np.clip(int(h - y1 - 1), 0, h - 1),
-                        np.clip(int(x1 + 1), 0, w - 1),
-                        np.clip(int(h - y0 + 1), 0, h - 1),
-                    )
-                    box[y0:y1, x0:x1] = 0
-            layout[page.pageno] = box
+            layout[page.pageno] = next_layout(pageno)
             # 新建一个 xref 存放新指令流
             page.page_xref = doc_zh.get_new_xref()  # hack 插入页面的新 xref
             doc_zh.update_object(page.page_xref, "<<>>")
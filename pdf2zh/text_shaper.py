@@ -5,12 +5,17 @@ This module provides text shaping capabilities for languages that require
 complex text layout, such as Thai, Arabic, Indic scripts, etc.
 """
 
+import bisect
 import logging
 import re
+import threading
 import unicodedata
-from typing import Dict, List, Optional, NamedTuple
-from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Dict, List, Optional, NamedTuple, Sequence
+from dataclasses import dataclass, field
 from functools import lru_cache
+from itertools import accumulate, chain, groupby
+from operator import attrgetter
 
 try:
     import uharfbuzz as hb
@@ -25,8 +30,141 @@ from pdf2zh.config import ConfigManager
 log = logging.getLogger(__name__)
 
 
-@dataclass
-class GlyphInfo:
+# Unicode blocks of the scripts we care about, sorted by first codepoint
+_SCRIPT_RANGES = (
+    (0x0000, 0x024F, "Latin"),  # Basic Latin .. Latin Extended-B
+    (0x0370, 0x03FF, "Greek"),
+    (0x0400, 0x04FF, "Cyrillic"),
+    (0x0590, 0x05FF, "Hebrew"),
+    (0x0600, 0x06FF, "Arabic"),
+    (0x0700, 0x074F, "Syriac"),
+    (0x0750, 0x077F, "Arabic"),  # Arabic Supplement
+    (0x0870, 0x089F, "Arabic"),  # Arabic Extended-B
+    (0x08A0, 0x08FF, "Arabic"),  # Arabic Extended-A
+    (0x0900, 0x097F, "Devanagari"),
+    (0x0980, 0x09FF, "Bengali"),
+    (0x0A00, 0x0A7F, "Gurmukhi"),
+    (0x0A80, 0x0AFF, "Gujarati"),
+    (0x0B00, 0x0B7F, "Oriya"),
+    (0x0B80, 0x0BFF, "Tamil"),
+    (0x0C00, 0x0C7F, "Telugu"),
+    (0x0C80, 0x0CFF, "Kannada"),
+    (0x0D00, 0x0D7F, "Malayalam"),
+    (0x0D80, 0x0DFF, "Sinhala"),
+    (0x0E00, 0x0E7F, "Thai"),
+    (0x0E80, 0x0EFF, "Laoo"),
+    (0x0F00, 0x0FFF, "Tibetan"),
+    (0x1000, 0x109F, "Myanmar"),
+    (0x1780, 0x17FF, "Khmer"),
+    (0x1800, 0x18AF, "Mongolian"),
+    (0x19E0, 0x19FF, "Khmer"),  # Khmer Symbols
+    (0x1A20, 0x1AAF, "Lana"),  # Tai Tham
+    (0x1E00, 0x1EFF, "Latin"),  # Latin Extended Additional
+    (0xA8E0, 0xA8FF, "Devanagari"),  # Devanagari Extended
+    (0xA9E0, 0xA9FF, "Myanmar"),  # Myanmar Extended-B
+    (0xAA60, 0xAA7F, "Myanmar"),  # Myanmar Extended-A
+    (0xFB1D, 0xFB4F, "Hebrew"),  # Hebrew presentation forms
+    (0xFB50, 0xFDFF, "Arabic"),  # Arabic Presentation Forms-A
+    (0xFE70, 0xFEFF, "Arabic"),  # Arabic Presentation Forms-B
+    (0x10EC0, 0x10EFF, "Arabic"),  # Arabic Extended-C
+    (0x11660, 0x1167F, "Mongolian"),  # Mongolian Supplement
+    (0x11B00, 0x11B5F, "Devanagari"),  # Devanagari Extended-A
+    (0x1EE00, 0x1EEFF, "Arabic"),  # Arabic Mathematical Alphabetic Symbols
+)
+# Script of the first word of a Unicode name, for blocks missing from the table
+_SCRIPT_NAMES = {
+    "THAI": "Thai",
+    "ARABIC": "Arabic",
+    "HEBREW": "Hebrew",
+    "DEVANAGARI": "Devanagari",
+    "BENGALI": "Bengali",
+    "MYANMAR": "Myanmar",
+    "KHMER": "Khmer",
+    "LAO": "Laoo",
+    "TIBETAN": "Tibetan",
+    "MONGOLIAN": "Mongolian",
+}
+_SCRIPT_STARTS = [lo for lo, _, _ in _SCRIPT_RANGES]
+_THAI_RE = re.compile("[\u0e00-\u0e7f]")
+_THAI_ONLY_RE = re.compile("[\u0e00-\u0e7f]+")
+
+
+@lru_cache(maxsize=4096)
+def _script_of(char: str) -> str:
+    """Get Unicode script for a character, from its block or else its Unicode name."""
+    if not char:
+        return "Latin"
+    cp = ord(char)
+    i = bisect.bisect_right(_SCRIPT_STARTS, cp) - 1
+    if i >= 0 and cp <= _SCRIPT_RANGES[i][1]:
+        return _SCRIPT_RANGES[i][2]
+    try:
+        name = unicodedata.name(char).split()[0]
+        return _SCRIPT_NAMES.get(name, name)
+    except (ValueError, IndexError):
+        return "Latin"
+
+
+# Features HarfBuzz already applies to horizontal text
+_DEFAULT_FEATURES = frozenset(
+    {"ccmp", "locl", "mark", "mkmk", "rlig", "liga", "clig", "kern", "calt", "rclt"}
+)
+
+
+def _without_default_features(features_by_script: Dict[str, dict]) -> Dict[str, dict]:
+    """Keep only the features that change HarfBuzz's defaults, per script.
+
+    uharfbuzz converts the feature mapping on every hb.shape call, so
+    features that are on anyway are not passed.
+    """
+    trimmed = {}
+    for script, features in features_by_script.items():
+        changed = {
+            tag: value
+            for tag, value in features.items()
+            if not (value is True and tag in _DEFAULT_FEATURES)
+        }
+        if changed:
+            trimmed[script] = changed
+    return trimmed
+
+
+class _ScriptTags(dict):
+    """str.translate table from codepoint to a one-character script tag, filled on use."""
+
+    def __init__(self):
+        super().__init__()
+        self.scripts: List[str] = []  # Script name of each tag, by tag ordinal
+        self._tag_of: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __missing__(self, cp: int) -> str:
+        script = _script_of(chr(cp))
+        with self._lock:
+            tag = self._tag_of.get(script)
+            if tag is None:
+                tag = self._tag_of[script] = chr(len(self.scripts))
+                self.scripts.append(script)
+        self[cp] = tag
+        return tag
+
+
+_SCRIPT_TAGS = _ScriptTags()
+# A run of one repeated script tag
+_TAG_RUN_RE = re.compile(r"(.)\1*", re.DOTALL)
+
+
+def _script_class_re(scripts) -> "re.Pattern":
+    """Compile a character class matching every codepoint in the blocks of scripts."""
+    ranges = "".join(
+        f"\\U{lo:08x}-\\U{hi:08x}"
+        for lo, hi, script in _SCRIPT_RANGES
+        if script in scripts
+    )
+    return re.compile(f"[{ranges}]")
+
+
+class GlyphInfo(NamedTuple):
     """Information about a shaped glyph."""
 
     glyph_id: int
@@ -41,18 +179,22 @@ class GlyphInfo:
 class ShapedText:
     """Result of text shaping operation."""
 
-    glyphs: List[GlyphInfo]
+    glyphs: Sequence[GlyphInfo]
     total_advance: float
     success: bool
+    _cluster_cache: Optional[Dict[int, List[GlyphInfo]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def get_cluster_info(self) -> Dict[int, List[GlyphInfo]]:
-        """Group glyphs by cluster for complex positioning."""
-        clusters = {}
-        for glyph in self.glyphs:
-            if glyph.cluster not in clusters:
-                clusters[glyph.cluster] = []
-            clusters[glyph.cluster].append(glyph)
-        return clusters
+        """Group glyphs by cluster for complex positioning, computed once."""
+        if self._cluster_cache is None:
+            # HarfBuzz keeps the glyphs of a cluster adjacent, so group runs
+            clusters = {}
+            for cluster, group in groupby(self.glyphs, key=attrgetter("cluster")):
+                clusters.setdefault(cluster, []).extend(group)
+            self._cluster_cache = clusters
+        return self._cluster_cache
 
 
 class TextRun(NamedTuple):
@@ -89,76 +231,130 @@ class TextShaper:
         "Sinhala",  # Indic
         "Tibetan",
         "Mongolian",  # Central Asian
+        "Lana",  # Tai Tham
+    }
+
+    # HarfBuzz script tags for the complex scripts
+    SCRIPT_MAP = {
+        "Thai": "thai",
+        "Arabic": "arab",
+        "Hebrew": "hebr",
+        "Devanagari": "deva",
+        "Bengali": "beng",
+        "Tamil": "taml",
+        "Telugu": "telu",
+        "Kannada": "knda",
+        "Malayalam": "mlym",
+        "Gujarati": "gujr",
+        "Gurmukhi": "guru",
+        "Oriya": "orya",
+        "Sinhala": "sinh",
+        "Myanmar": "mymr",
+        "Khmer": "khmr",
+        "Laoo": "lao ",
+        "Tibetan": "tibt",
+        "Mongolian": "mong",
+        "Lana": "lana",
+    }
+
+    # Advanced OpenType features per script, for better Thai shaping
+    THAI_FEATURES = {
+        "liga": True,  # Ligatures
+        "kern": True,  # Kerning
+        "mark": True,  # Mark positioning
+        "mkmk": True,  # Mark-to-mark positioning (essential for Thai)
+        "ccmp": True,  # Glyph composition/decomposition
     }
+    FEATURES_BY_SCRIPT = _without_default_features({"Thai": THAI_FEATURES})
+
+    # Any character of a complex script; search() stops at the first one
+    COMPLEX_RE = _script_class_re(COMPLEX_SCRIPTS)
 
     # Formula pattern to preserve during shaping
     FORMULA_PATTERN = re.compile(r"\{v\d+\}")
 
+    # Placed between runs that are shaped together in one buffer
+    BATCH_SEPARATOR = "\ufffc"
+
+    # Number of shaped strings kept per shaper, overridable with SHAPE_CACHE_SIZE
+    SHAPE_CACHE_SIZE = 8192
+    # Number of shaped runs kept per shaper
+    RUN_CACHE_SIZE = 4096
+
     def __init__(self):
         # Enable text shaping with HarfBuzz
         self.enabled = (
             HARFBUZZ_AVAILABLE
             and ConfigManager.get("TEXT_SHAPING_ENABLED", "true").lower() == "true"
         )
-        self._font_cache: Dict[str, hb.Font] = {}
+        # Font that shapes most complex text, read once like the other settings
+        self.default_font_path: Optional[str] = ConfigManager.get("NOTO_FONT_PATH")
+        self._font_cache: Dict[tuple, hb.Font] = {}
         self._face_cache: Dict[str, hb.Face] = {}
+        # One reusable HarfBuzz buffer per thread
+        self._local = threading.local()
+        # Shaped results keyed by (text, font_path, font_size), least recently used first
+        self._shape_cache: "OrderedDict[tuple, ShapedText]" = OrderedDict()
+        # Shaped runs keyed by (run_text, script, font_path, font_size), clusters run-relative
+        self._run_cache: "OrderedDict[tuple, ShapedText]" = OrderedDict()
+        self._shape_cache_lock = threading.Lock()
+        self.shape_cache_size = self.SHAPE_CACHE_SIZE
+        custom_cache_size = ConfigManager.get("SHAPE_CACHE_SIZE")
+        if custom_cache_size:
+            try:
+                self.shape_cache_size = int(custom_cache_size)
+            except (ValueError, TypeError):
+                log.warning(
+                    f"Invalid shape cache size, using default: {self.shape_cache_size}"
+                )
 
         if self.enabled:
             log.info("Text shaping enabled with HarfBuzz")
         else:
             log.info("Text shaping disabled")
 
-    @lru_cache(maxsize=1000)
     def _get_script(self, char: str) -> str:
         """Get Unicode script for a character."""
-        try:
-            script = unicodedata.name(char).split()[0] if char else "Latin"
-            # Normalize script names to match our COMPLEX_SCRIPTS set
-            script_mapping = {
-                "THAI": "Thai",
-                "ARABIC": "Arabic",
-                "HEBREW": "Hebrew",
-                "DEVANAGARI": "Devanagari",
-                "BENGALI": "Bengali",
-                "MYANMAR": "Myanmar",
-                "KHMER": "Khmer",
-                "LAO": "Laoo",
-                "TIBETAN": "Tibetan",
-                "MONGOLIAN": "Mongolian"
-            }
-            return script_mapping.get(script, script)
-        except (ValueError, IndexError):
-            # Fallback to Unicode range detection for Thai
-            if char and 0x0E00 <= ord(char) <= 0x0E7F:
-                return "Thai"
-            return "Latin"
+        return _script_of(char)
+
+    def needs_shaping(self, text: str) -> bool:
+        """Check whether text should go through HarfBuzz at all.
+
+        Callers can use this to skip building runs and glyphs for simple text.
+        """
+        return self._needs_shaping(text)
 
     def _needs_shaping(self, text: str) -> bool:
         """Check if text contains characters that need complex shaping."""
         if not self.enabled:
-            log.debug(f"🚫 Text shaping disabled - skipping '{text}'")
+            log.debug("🚫 Text shaping disabled - skipping '%s'", text)
             return False
 
         if not text:
             log.debug("🚫 Empty text - no shaping needed")
             return False
 
-        # Check if any character belongs to a complex script
-        complex_chars = []
-        for char in text:
-            script = self._get_script(char)
-            if script in self.COMPLEX_SCRIPTS:
-                complex_chars.append(f"{char}({script})")
+        # ASCII text never contains a complex script, and isascii() is a flag check
+        needs_shaping = not text.isascii() and self.COMPLEX_RE.search(text) is not None
 
-        if complex_chars:
+        if needs_shaping:
             # Use INFO level for Thai text detection to make it more visible
-            if any(0x0E00 <= ord(char) <= 0x0E7F for char in text):
-                log.info(f"🇹🇭 Thai text detected: '{text}' - will use HarfBuzz shaping")
-            else:
-                log.debug(f"🔤 Text '{text}' needs shaping - complex chars: {', '.join(complex_chars)}")
+            if log.isEnabledFor(logging.INFO) and _THAI_RE.search(text):
+                log.info("🇹🇭 Thai text detected: '%s' - will use HarfBuzz shaping", text)
+            elif log.isEnabledFor(logging.DEBUG):
+                complex_chars = [
+                    f"{char}({self._get_script(char)})"
+                    for char in text
+                    if self._get_script(char) in self.COMPLEX_SCRIPTS
+                ]
+                log.debug(
+                    "🔤 Text '%s' needs shaping - complex chars: %s",
+                    text,
+                    ", ".join(complex_chars),
+                )
             return True
         else:
-            log.debug(f"📝 Text '{text}' is simple script - no shaping needed")
+            log.debug("📝 Text '%s' is simple script - no shaping needed", text)
             return False
 
     def _split_text_runs(self, text: str) -> List[TextRun]:
@@ -166,89 +362,68 @@ class TextShaper:
         if not text:
             return []
 
-        runs = []
-        current_script = None
-        current_start = 0
-
-        for i, char in enumerate(text):
-            # Skip formula markers
-            if self.FORMULA_PATTERN.match(text[i : i + 5]):
-                # End current run if exists
-                if current_script is not None:
-                    runs.append(
-                        TextRun(
-                            text=text[current_start:i],
-                            start_index=current_start,
-                            end_index=i,
-                            script=current_script,
-                        )
-                    )
+        # Single-script text, common for words and short chunks, is one run
+        if text.isascii() and "{" not in text:
+            return [TextRun(text, 0, len(text), "Latin")]
+        if _THAI_ONLY_RE.fullmatch(text):
+            return [TextRun(text, 0, len(text), "Thai")]
 
-                # Find end of formula marker
-                formula_match = self.FORMULA_PATTERN.match(text[i:])
-                if formula_match:
-                    formula_end = i + len(formula_match.group(0))
-                    runs.append(
-                        TextRun(
-                            text=text[i:formula_end],
-                            start_index=i,
-                            end_index=formula_end,
-                            script="Formula",
-                        )
+        runs = []
+        pos = 0
+        # Tag every character with its script in one pass
+        tagged = text.translate(_SCRIPT_TAGS)
+        scripts = _SCRIPT_TAGS.scripts
+
+        # Locate formula markers once, then split the text between them by script
+        for formula_match in chain(self.FORMULA_PATTERN.finditer(text), (None,)):
+            end = formula_match.start() if formula_match else len(text)
+
+            # Each stretch of one repeated tag is a run
+            for tag_run in _TAG_RUN_RE.finditer(tagged, pos, end):
+                runs.append(
+                    TextRun(
+                        text=text[tag_run.start() : tag_run.end()],
+                        start_index=tag_run.start(),
+                        end_index=tag_run.end(),
+                        script=scripts[ord(tag_run.group(1))],
                     )
-                    current_script = None
-                    current_start = formula_end
-                    i = formula_end - 1  # Will be incremented by loop
-                continue
+                )
 
-            char_script = self._get_script(char)
-
-            # Start new run if script changes
-            if current_script != char_script:
-                if current_script is not None:
-                    runs.append(
-                        TextRun(
-                            text=text[current_start:i],
-                            start_index=current_start,
-                            end_index=i,
-                            script=current_script,
-                        )
+            # Formula markers are kept as their own runs
+            if formula_match:
+                runs.append(
+                    TextRun(
+                        text=formula_match.group(0),
+                        start_index=formula_match.start(),
+                        end_index=formula_match.end(),
+                        script="Formula",
                     )
-                current_script = char_script
-                current_start = i
-
-        # Add final run
-        if current_script is not None:
-            runs.append(
-                TextRun(
-                    text=text[current_start:],
-                    start_index=current_start,
-                    end_index=len(text),
-                    script=current_script,
                 )
-            )
+                pos = formula_match.end()
 
         return runs
 
+    def _load_face(self, font_path: str) -> "hb.Face":
+        """Load and cache the HarfBuzz face of a font file."""
+        face = self._face_cache.get(font_path)
+        if face is None:
+            # HarfBuzz maps the file instead of copying it into Python bytes
+            face = hb.Face(hb.Blob.from_file_path(font_path))
+            self._face_cache[font_path] = face
+        return face
+
     def _load_font(self, font_path: str, font_size: float) -> Optional[hb.Font]:
         """Load and cache a HarfBuzz font."""
-        cache_key = f"{font_path}:{font_size}"
+        cache_key = (font_path, font_size)
 
-        if cache_key in self._font_cache:
-            return self._font_cache[cache_key]
+        font = self._font_cache.get(cache_key)
+        if font is not None:
+            return font
 
         try:
-            # Load font face
-            if font_path not in self._face_cache:
-                with open(font_path, "rb") as f:
-                    font_data = f.read()
-                face = hb.Face(font_data)
-                self._face_cache[font_path] = face
-            else:
-                face = self._face_cache[font_path]
-
-            # Create font with size
-            font = hb.Font(face)
+            # Every size shares the face and the tables HarfBuzz parses on it.
+            # Fonts stay per size so concurrent shaping never changes a scale
+            font = hb.Font(self._load_face(font_path))
             font.scale = (int(font_size * 64), int(font_size * 64))  # 26.6 fixed point
 
             self._font_cache[cache_key] = font
@@ -258,81 +433,61 @@ class TextShaper:
             log.warning(f"Failed to load font {font_path}: {e}")
             return None
 
+    def _get_buffer(self) -> "hb.Buffer":
+        """Return this thread's HarfBuzz buffer, emptied for reuse."""
+        buf = getattr(self._local, "buffer", None)
+        if buf is None:
+            buf = self._local.buffer = hb.Buffer()
+        else:
+            buf.clear_contents()
+        return buf
+
+    def _shape_buffer(self, text_run: TextRun, font: hb.Font) -> "hb.Buffer":
+        """Shape a single text run into this thread's HarfBuzz buffer."""
+        buf = self._get_buffer()
+        buf.add_str(text_run.text)
+        buf.guess_segment_properties()
+
+        # Set script if known
+        script_tag = self.SCRIPT_MAP.get(text_run.script)
+        if script_tag:
+            buf.script = script_tag
+
+        # Set direction
+        if text_run.direction == "rtl":
+            buf.direction = "rtl"
+        else:
+            buf.direction = "ltr"
+
+        # Shape the text with script-specific features
+        features = self.FEATURES_BY_SCRIPT.get(text_run.script)
+        if features:
+            hb.shape(font, buf, features)
+        else:
+            hb.shape(font, buf)
+        return buf
+
     def _shape_run(self, text_run: TextRun, font: hb.Font) -> ShapedText:
         """Shape a single text run using HarfBuzz."""
         try:
-            # Create buffer
-            buf = hb.Buffer()
-            buf.add_str(text_run.text)
-            buf.guess_segment_properties()
-
-            # Set script if known
-            if text_run.script in self.COMPLEX_SCRIPTS:
-                script_map = {
-                    "Thai": "thai",
-                    "Arabic": "arab",
-                    "Hebrew": "hebr",
-                    "Devanagari": "deva",
-                    "Bengali": "beng",
-                    "Tamil": "taml",
-                    "Telugu": "telu",
-                    "Kannada": "knda",
-                    "Malayalam": "mlym",
-                    "Gujarati": "gujr",
-                    "Gurmukhi": "guru",
-                    "Oriya": "orya",
-                    "Sinhala": "sinh",
-                    "Myanmar": "mymr",
-                    "Khmer": "khmr",
-                    "Laoo": "lao ",
-                    "Tibetan": "tibt",
-                    "Mongolian": "mong",
-                }
-                if text_run.script in script_map:
-                    buf.script = script_map[text_run.script]
-
-            # Set direction
-            if text_run.direction == "rtl":
-                buf.direction = "rtl"
-            else:
-                buf.direction = "ltr"
-
-            # Enable advanced OpenType features for better Thai shaping
-            features = {}
-            if text_run.script == "Thai":
-                # Enable essential Thai shaping features
-                features.update({
-                    "liga": True,  # Ligatures
-                    "kern": True,  # Kerning
-                    "mark": True,  # Mark positioning
-                    "mkmk": True,  # Mark-to-mark positioning (essential for Thai)
-                    "ccmp": True,  # Glyph composition/decomposition
-                })
-
-            # Shape the text with features
-            if features:
-                hb.shape(font, buf, features)
-            else:
-                hb.shape(font, buf)
-
-            # Extract glyph information
-            glyph_infos = buf.glyph_infos
-            glyph_positions = buf.glyph_positions
-
-            glyphs = []
-            total_advance = 0.0
-
-            for info, pos in zip(glyph_infos, glyph_positions):
-                glyph = GlyphInfo(
-                    glyph_id=info.codepoint,
-                    cluster=info.cluster,
-                    x_advance=pos.x_advance / 64.0,  # Convert from 26.6 fixed point
-                    y_advance=pos.y_advance / 64.0,
-                    x_offset=pos.x_offset / 64.0,
-                    y_offset=pos.y_offset / 64.0,
+            buf = self._shape_buffer(text_run, font)
+
+            # Extract glyph information in one pass, converting from 26.6 fixed point
+            start = text_run.start_index  # Clusters index into the full text
+            glyphs = [
+                GlyphInfo(
+                    info.codepoint,
+                    info.cluster + start,
+                    pos.x_advance / 64.0,
+                    pos.y_advance / 64.0,
+                    pos.x_offset / 64.0,
+                    pos.y_offset / 64.0,
                 )
-                glyphs.append(glyph)
-                total_advance += glyph.x_advance
+                for info, pos in zip(buf.glyph_infos, buf.glyph_positions)
+            ]
+            # Advances in 1/64 units are exact in binary, so summing the scaled
+            # values gives the same total without a second pass over the buffer
+            total_advance = sum(glyph.x_advance for glyph in glyphs)
 
             return ShapedText(glyphs=glyphs, total_advance=total_advance, success=True)
 
@@ -340,6 +495,97 @@ class TextShaper:
             log.warning(f"Text shaping failed for run '{text_run.text}': {e}")
             return ShapedText(glyphs=[], total_advance=0.0, success=False)
 
+    def _shape_run_cached(
+        self, text_run: TextRun, font: hb.Font, font_path: str, font_size: float
+    ) -> ShapedText:
+        """Shape a run with clusters relative to the run, reusing earlier results."""
+        cache_key = (text_run.text, text_run.script, font_path, round(font_size, 2))
+        with self._shape_cache_lock:
+            shaped = self._run_cache.get(cache_key)
+            if shaped is not None:
+                self._run_cache.move_to_end(cache_key)
+                return shaped
+
+        shaped = self._shape_run(
+            text_run._replace(start_index=0, end_index=len(text_run.text)), font
+        )
+        if shaped.success:
+            with self._shape_cache_lock:
+                self._run_cache[cache_key] = shaped
+                if len(self._run_cache) > self.RUN_CACHE_SIZE:
+                    self._run_cache.popitem(last=False)
+        return shaped
+
+    def prefetch_runs(self, texts: List[str], font_path: str, font_size: float) -> None:
+        """
+        Shape the uncached runs of several texts with one HarfBuzz call per script.
+
+        Setup dominates shaping short runs, so the runs of a whole page are
+        joined with BATCH_SEPARATOR and shaped together. The results fill the
+        run cache that shape_text reads.
+
+        Args:
+            texts: Texts that are about to be shaped with shape_text
+            font_path: Path to font file
+            font_size: Font size in points
+        """
+        if not self.enabled:
+            return
+        font = self._load_font(font_path, font_size)
+        if not font:
+            return
+
+        size_key = round(font_size, 2)
+        # A run starting with a mark would join the separator's cluster
+        runs = [
+            run
+            for text in texts
+            for run in self._split_text_runs(text)
+            if run.script != "Formula" and unicodedata.category(run.text[0])[0] != "M"
+        ]
+        batches: Dict[str, Dict[str, None]] = {}  # script -> run texts, in order
+        with self._shape_cache_lock:
+            for run in runs:
+                if (run.text, run.script, font_path, size_key) not in self._run_cache:
+                    batches.setdefault(run.script, {})[run.text] = None
+
+        for script, run_texts in batches.items():
+            if len(run_texts) > 1:
+                self._shape_batch(list(run_texts), script, font, font_path, size_key)
+
+    def _shape_batch(
+        self,
+        run_texts: List[str],
+        script: str,
+        font: hb.Font,
+        font_path: str,
+        size_key: float,
+    ) -> None:
+        """Shape runs of one script in a single buffer and cache each run's glyphs."""
+        joined = self.BATCH_SEPARATOR.join(run_texts)
+        shaped = self._shape_run(TextRun(joined, 0, len(joined), script), font)
+        if not shaped.success:
+            return
+
+        # Run i covers [starts[i], starts[i] + len(run_texts[i])), then a separator
+        starts = list(accumulate((len(text) + 1 for text in run_texts), initial=0))
+        run_glyphs = [[] for _ in run_texts]
+        for glyph in shaped.glyphs:
+            i = bisect.bisect_right(starts, glyph.cluster) - 1
+            cluster = glyph.cluster - starts[i]
+            if cluster < len(run_texts[i]):  # Separator glyphs are dropped
+                run_glyphs[i].append(glyph._replace(cluster=cluster))
+
+        with self._shape_cache_lock:
+            for text, glyphs in zip(run_texts, run_glyphs):
+                self._run_cache[(text, script, font_path, size_key)] = ShapedText(
+                    glyphs=glyphs,
+                    total_advance=sum(glyph.x_advance for glyph in glyphs),
+                    success=True,
+                )
+            while len(self._run_cache) > self.RUN_CACHE_SIZE:
+                self._run_cache.popitem(last=False)
+
     def shape_text(
         self, text: str, font_path: str, font_size: float
     ) -> Optional[ShapedText]:
@@ -352,17 +598,26 @@ class TextShaper:
             font_size: Font size in points
 
         Returns:
-            ShapedText object with glyph information, or None if shaping not needed
+            ShapedText object with glyph information, or None if shaping not needed.
+            Successful results are cached and shared between callers, so they
+            must not be modified.
         """
-        log.debug(f"🎯 shape_text called: '{text}' (font: {font_path}, size: {font_size})")
+        log.debug("🎯 shape_text called: '%s' (font: %s, size: %s)", text, font_path, font_size)
+
+        cache_key = (text, font_path, round(font_size, 2))
+        with self._shape_cache_lock:
+            shaped = self._shape_cache.get(cache_key)
+            if shaped is not None:
+                self._shape_cache.move_to_end(cache_key)
+                return shaped
 
         if not self._needs_shaping(text):
-            log.debug(f"⏭️ No shaping needed for '{text}' - returning None")
+            log.debug("⏭️ No shaping needed for '%s' - returning None", text)
             return None
 
         font = self._load_font(font_path, font_size)
         if not font:
-            log.debug(f"❌ Failed to load font '{font_path}' for text '{text}'")
+            log.debug("❌ Failed to load font '%s' for text '%s'", font_path, text)
             return None
 
         # Split text into runs
@@ -378,17 +633,37 @@ class TextShaper:
                 # Skip formula markers - they will be handled separately
                 continue
 
-            shaped = self._shape_run(run, font)
+            shaped = self._shape_run_cached(run, font, font_path, font_size)
             if not shaped.success:
                 success = False
                 break
 
-            all_glyphs.extend(shaped.glyphs)
+            if run.start_index:
+                all_glyphs.extend(
+                    GlyphInfo(
+                        g.glyph_id,
+                        g.cluster + run.start_index,
+                        g.x_advance,
+                        g.y_advance,
+                        g.x_offset,
+                        g.y_offset,
+                    )
+                    for g in shaped.glyphs
+                )
+            else:
+                all_glyphs.extend(shaped.glyphs)
             total_advance += shaped.total_advance
 
-        return ShapedText(
-            glyphs=all_glyphs, total_advance=total_advance, success=success
+        # Cached results are shared, so hand out an immutable glyph sequence
+        shaped = ShapedText(
+            glyphs=tuple(all_glyphs), total_advance=total_advance, success=success
         )
+        if success:
+            with self._shape_cache_lock:
+                self._shape_cache[cache_key] = shaped
+                if len(self._shape_cache) > self.shape_cache_size:
+                    self._shape_cache.popitem(last=False)
+        return shaped
 
     def get_text_advance(
         self, text: str, font_path: str, font_size: float
@@ -425,27 +700,29 @@ class TextShaper:
         if not shaped or not shaped.success:
             return None
 
-        # Group glyphs by cluster
-        clusters = shaped.get_cluster_info()
+        # Group glyphs by cluster into flat per-character lists
+        n = len(text)
+        cluster_glyphs: List[List[GlyphInfo]] = [[] for _ in range(n)]
+        cluster_advance = [0.0] * n
+        for glyph in shaped.glyphs:
+            if glyph.cluster < n:
+                cluster_glyphs[glyph.cluster].append(glyph)
+                # Cluster advance is the sum of all glyph advances in the cluster
+                cluster_advance[glyph.cluster] += glyph.x_advance
 
         # Build character position list
         positions = []
 
-        for char_idx in range(len(text)):
-            if char_idx in clusters:
-                cluster_glyphs = clusters[char_idx]
-
-                # Calculate cluster advance (sum of all glyph advances in cluster)
-                cluster_advance = sum(g.x_advance for g in cluster_glyphs)
-
+        for glyphs, advance in zip(cluster_glyphs, cluster_advance):
+            if glyphs:
                 # For the base character, use the full cluster advance
                 # For combining marks, use zero advance (they position relative to base)
                 positions.append(
                     {
-                        "x_advance": cluster_advance,
-                        "x_offset": cluster_glyphs[0].x_offset,
-                        "y_offset": cluster_glyphs[0].y_offset,
-                        "glyphs": cluster_glyphs,
+                        "x_advance": advance,
+                        "x_offset": glyphs[0].x_offset,
+                        "y_offset": glyphs[0].y_offset,
+                        "glyphs": glyphs,
                     }
                 )
             else:
@@ -457,13 +734,33 @@ class TextShaper:
         return positions
 
 
-# Global text shaper instance
-_text_shaper = None
+# Global text shaper instance, rebuilt when NOTO_FONT_PATH changes
+_text_shaper: Optional[TextShaper] = None
+_text_shaper_lock = threading.Lock()
 
 
 def get_text_shaper() -> TextShaper:
     """Get the global text shaper instance."""
     global _text_shaper
-    if _text_shaper is None:
-        _text_shaper = TextShaper()
-    return _text_shaper
+    font_path = ConfigManager.get("NOTO_FONT_PATH")
+    text_shaper = _text_shaper
+    if text_shaper is not None and text_shaper.default_font_path == font_path:
+        return text_shaper
+    # Only rebuilding takes the lock, checking again under it
+    with _text_shaper_lock:
+        previous = _text_shaper
+        if previous is not None and previous.default_font_path == font_path:
+            return previous
+        text_shaper = TextShaper()
+        if previous is not None:
+            # Faces are keyed by path, so the ones already mapped stay valid
+            text_shaper._face_cache = previous._face_cache
+        # Map the default font up front, it shapes most complex text
+        noto_path = text_shaper.default_font_path
+        if text_shaper.enabled and noto_path:
+            try:
+                text_shaper._load_face(noto_path)
+            except Exception as e:
+                log.debug("Could not preload font %s: %s", noto_path, e)
+        _text_shaper = text_shaper
+        return text_shaper
@@ -11,6 +11,7 @@ import deepl
 import ollama
 import openai
 import requests
+from requests.adapters import HTTPAdapter
 import xinference_client
 from azure.ai.translation.text import TextTranslationClient
 from azure.core.credentials import AzureKeyCredential
@@ -33,15 +34,30 @@ from tenacity import wait_exponential
 logger = logging.getLogger(__name__)
 
 
+# Enough keep-alive connections for the converter's translation threads
+HTTP_POOL_MAXSIZE = 32
+
+
 def remove_control_characters(s):
     return "".join(ch for ch in s if unicodedata.category(ch)[0] != "C")
 
 
+def new_session(pool_maxsize: int = HTTP_POOL_MAXSIZE) -> requests.Session:
+    """Create a requests session whose connection pool is shared by all threads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 class BaseTranslator:
     name = "base"
     envs = {}
     lang_map: dict[str, str] = {}
     CustomPrompt = False
+    # Max texts per do_translate_batch request; 1 means no native batch endpoint
+    batch_size = 1
 
     def __init__(self, lang_in: str, lang_out: str, model: str, ignore_cache: bool):
         lang_in = self.lang_map.get(lang_in.lower(), lang_in)
@@ -133,6 +149,44 @@ class BaseTranslator:
         """
         raise NotImplementedError
 
+    def translate_batch(
+        self, texts: list[str], ignore_cache: bool = False
+    ) -> list[str]:
+        """
+        Translate several texts, sending the cache misses in one backend request.
+        :param texts: texts to translate, at most batch_size of them
+        :return: translated texts, in the same order as texts
+        """
+        if self.batch_size <= 1:
+            return [self.translate(text, ignore_cache) for text in texts]
+
+        translations = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if not (self.ignore_cache or ignore_cache):
+                translations[i] = self.cache.get(text)
+            if translations[i] is None:
+                pending.append(i)
+
+        if pending:
+            results = self.do_translate_batch([texts[i] for i in pending])
+            if len(results) != len(pending):
+                raise ValueError(
+                    f"Batch translation returned {len(results)} texts for {len(pending)}"
+                )
+            for i, translation in zip(pending, results):
+                self.cache.set(texts[i], translation)
+                translations[i] = translation
+        return translations
+
+    def do_translate_batch(self, texts: list[str]) -> list[str]:
+        """
+        Actual translate several texts, override this method for multi-text endpoints
+        :param texts: texts to translate
+        :return: translated texts
+        """
+        return [self.do_translate(text) for text in texts]
+
     def prompt(
         self, text: str, prompt_template: Template | None = None
     ) -> list[dict[str, str]]:
@@ -193,7 +247,7 @@ class GoogleTranslator(BaseTranslator):
 
     def __init__(self, lang_in, lang_out, model, ignore_cache=False, **kwargs):
         super().__init__(lang_in, lang_out, model, ignore_cache)
-        self.session = requests.Session()
+        self.session = new_session()
         self.endpoint = "https://translate.google.com/m"
         self.headers = {
             "User-Agent": "Mozilla/4.0 (compatible;MSIE 6.0;Windows NT 5.1;SV1;.NET CLR 1.1.4322;.NET CLR 2.0.50727;.NET CLR 3.0.04506.30)"  # noqa: E501
@@ -224,7 +278,7 @@ class BingTranslator(BaseTranslator):
 
     def __init__(self, lang_in, lang_out, model, ignore_cache=False, **kwargs):
         super().__init__(lang_in, lang_out, model, ignore_cache)
-        self.session = requests.Session()
+        self.session = new_session()
         self.endpoint = "https://www.bing.com/translator"
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36 Edg/131.0.0.0",  # noqa: E501
@@ -266,6 +320,7 @@ class DeepLTranslator(BaseTranslator):
         "DEEPL_AUTH_KEY": None,
     }
     lang_map = {"zh": "zh-Hans"}
+    batch_size = 50  # texts per translate_text request
 
     def __init__(
         self, lang_in, lang_out, model, envs=None, ignore_cache=False, **kwargs
@@ -281,6 +336,12 @@ class DeepLTranslator(BaseTranslator):
         )
         return response.text
 
+    def do_translate_batch(self, texts):
+        responses = self.client.translate_text(
+            texts, target_lang=self.lang_out, source_lang=self.lang_in
+        )
+        return [response.text for response in responses]
+
 
 class DeepLXTranslator(BaseTranslator):
     # https://deeplx.owo.network/endpoints/free.html
@@ -297,7 +358,7 @@ class DeepLXTranslator(BaseTranslator):
         self.set_envs(envs)
         super().__init__(lang_in, lang_out, model, ignore_cache)
         self.endpoint = self.envs["DEEPLX_ENDPOINT"]
-        self.session = requests.Session()
+        self.session = new_session()
         auth_key = self.envs["DEEPLX_ACCESS_TOKEN"]
         if auth_key:
             self.endpoint = f"{self.endpoint}?token={auth_key}"
@@ -714,6 +775,7 @@ class AzureTranslator(BaseTranslator):
         "AZURE_API_KEY": None,
     }
     lang_map = {"zh": "zh-Hans"}
+    batch_size = 100  # body elements per translate request
 
     def __init__(
         self, lang_in, lang_out, model, envs=None, ignore_cache=False, **kwargs
@@ -739,6 +801,14 @@ class AzureTranslator(BaseTranslator):
         translated_text = response[0].translations[0].text
         return translated_text
 
+    def do_translate_batch(self, texts):
+        response = self.client.translate(
+            body=texts,
+            from_language=self.lang_in,
+            to_language=[self.lang_out],
+        )
+        return [item.translations[0].text for item in response]
+
 
 class TencentTranslator(BaseTranslator):
     # https://github.com/TencentCloud/tencentcloud-sdk-python
@@ -793,6 +863,7 @@ class AnythingLLMTranslator(BaseTranslator):
             "Content-Type": "application/json",
         }
         self.prompttext = prompt
+        self.session = new_session()
 
     def do_translate(self, text):
         messages = self.prompt(text, self.prompttext)
@@ -802,7 +873,7 @@ class AnythingLLMTranslator(BaseTranslator):
             "sessionId": "translation_expert",
         }
 
-        response = requests.post(
+        response = self.session.post(
             self.api_url, headers=self.headers, data=json.dumps(payload)
         )
         response.raise_for_status()
@@ -826,6 +897,7 @@ class DifyTranslator(BaseTranslator):
         super().__init__(lang_out, lang_in, model, ignore_cache)
         self.api_url = self.envs["DIFY_API_URL"]
         self.api_key = self.envs["DIFY_API_KEY"]
+        self.session = new_session()
 
     def do_translate(self, text):
         headers = {
@@ -844,7 +916,7 @@ class DifyTranslator(BaseTranslator):
         }
 
         # 向 Dify 服务器发送请求
-        response = requests.post(
+        response = self.session.post(
             self.api_url, headers=headers, data=json.dumps(payload)
         )
         response.raise_for_status()
@@ -1,5 +1,10 @@
+import os
+import re
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch
+
+import numpy as np
+from pymupdf import Font
 from pdfminer.layout import LTPage, LTChar, LTLine
 from pdfminer.pdfinterp import PDFResourceManager
 from pdf2zh.converter import PDFConverterEx, TranslateConverter
@@ -87,14 +92,68 @@ class TestTranslateConverter(unittest.TestCase):
         ltline = LTLine(0.1, (0, 0), (10, 20))
         ltpage.add(ltchar)
         ltpage.add(ltline)
-        mock_layout = MagicMock()
-        mock_layout.shape = (100, 100)
-        mock_layout.__getitem__.return_value = -1
-        self.converter.layout = [None, mock_layout]
+        self.converter.layout = [None, np.full((100, 100), -1.0)]
         self.converter.thread = 1
         result = self.converter.receive_layout(ltpage)
         self.assertIsNotNone(result)
 
+    def test_shape_text_run_fallback_skips_word_hints(self):
+        with patch.object(self.converter, "_get_font_path", return_value=""):
+            glyphs = self.converter._shape_text_run("ab\u200bab", "tiro", 12.0, 12.0)
+        # The zero-width space is a break hint only and gets no glyph
+        self.assertEqual([g.glyph_id for g in glyphs], [ord(c) for c in "abab"])
+        self.assertEqual([g.cluster for g in glyphs], [0, 1, 3, 4])
+
+    def test_receive_layout_out_of_range_formula_marker(self):
+        font_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "fonts",
+            "Sarabun-Regular.ttf",
+        )
+        converter = TranslateConverter(
+            self.rsrcmgr,
+            layout={1: np.ones((200, 200))},
+            lang_in="en",
+            lang_out="th",
+            service="google",
+            thread=1,
+            noto_name="noto",
+            noto=Font(fontfile=font_path),
+        )
+        ltpage = LTPage(1, (0, 0, 200, 200))
+        mock_font = Mock()
+        mock_font.fontname = "mock_font"
+        for i, ch in enumerate("Hello"):
+            ltpage.add(
+                LTChar(
+                    matrix=(1, 0, 0, 1, 10 + 6 * i, 100),
+                    font=mock_font,
+                    fontsize=10,
+                    scaling=1.0,
+                    rise=0,
+                    text=ch,
+                    textwidth=0.6,
+                    textdisp=(0, 0),
+                    ncs=Mock(),
+                    graphicstate=Mock(),
+                )
+            )
+        with (
+            # {v9} does not exist, it is skipped and the text around it kept
+            patch.object(
+                converter.translator, "translate", return_value="ก่อน{v9}ข้อความ"
+            ),
+            patch.object(converter, "_get_font_path", return_value=font_path),
+        ):
+            ops = converter.receive_layout(ltpage)
+            expected = converter.text_shaper.shape_text("ก่อนข้อความ", font_path, 12.0)
+        gids = [
+            int(run[i : i + 4], 16)
+            for run in re.findall(r"\[<([0-9a-f]+)>\]", ops)
+            for i in range(0, len(run), 4)
+        ]
+        self.assertEqual(gids, [glyph.glyph_id for glyph in expected.glyphs])
+
     def test_invalid_translation_service(self):
         with self.assertRaises(ValueError):
             TranslateConverter(
@@ -0,0 +1,36 @@
+import io
+import unittest
+from unittest.mock import Mock
+
+import pymupdf
+from pymupdf import Font
+
+from pdf2zh.high_level import translate_patch
+
+
+class TestTranslatePatch(unittest.TestCase):
+    def test_pages_beyond_document(self):
+        doc = pymupdf.open()
+        doc.new_page()
+        stream = doc.tobytes()
+        doc_zh = pymupdf.open(stream=stream)
+        model = Mock()
+        model.predict.return_value = [Mock(boxes=[], names={})]
+        # "First 5 pages" on a single page document
+        translate_patch(
+            io.BytesIO(stream),
+            pages=list(range(0, 5)),
+            thread=1,
+            doc_zh=doc_zh,
+            lang_in="en",
+            lang_out="zh",
+            service="google",
+            noto_name="noto",
+            noto=Font("helv"),
+            model=model,
+        )
+        self.assertEqual(model.predict.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,13 @@ import tempfile
 import unittest
 from unittest.mock import Mock, patch
 
-from pdf2zh.text_shaper import TextShaper, TextRun, get_text_shaper
+from pdf2zh.text_shaper import (
+    GlyphInfo,
+    ShapedText,
+    TextRun,
+    TextShaper,
+    get_text_shaper,
+)
 
 
 class TestTextShaper(unittest.TestCase):
@@ -50,6 +56,19 @@ class TestTextShaper(unittest.TestCase):
             with patch.object(self.text_shaper, "_get_script", return_value="Thai"):
                 self.assertTrue(self.text_shaper._needs_shaping(thai_text))
 
+    def test_needs_shaping_extension_blocks(self):
+        """Test characters from script extension blocks."""
+        extension_chars = {
+            "\u08a0": "Arabic",  # Arabic Extended-A
+            "\u19e0": "Khmer",  # Khmer Symbols
+            "\uaa60": "Myanmar",  # Myanmar Extended-A
+            "\U0001ee00": "Arabic",  # Arabic Mathematical Alphabetic Symbols
+        }
+        with patch.object(self.text_shaper, "enabled", True):
+            for char, script in extension_chars.items():
+                self.assertEqual(self.text_shaper._get_script(char), script)
+                self.assertTrue(self.text_shaper._needs_shaping("a" + char))
+
     def test_split_text_runs(self):
         """Test text run splitting."""
         # Test mixed script text
@@ -85,6 +104,38 @@ class TestTextShaper(unittest.TestCase):
         self.assertEqual(len(formula_runs), 1)
         self.assertEqual(formula_runs[0].text, "{v1}")
 
+    def test_split_text_runs_around_formula(self):
+        """Test that runs around formula markers cover the text exactly once."""
+        text = "Hello {v12} สวัสดี"
+        runs = self.text_shaper._split_text_runs(text)
+
+        self.assertEqual(
+            [(run.text, run.script) for run in runs],
+            [
+                ("Hello ", "Latin"),
+                ("{v12}", "Formula"),
+                (" ", "Latin"),
+                ("สวัสดี", "Thai"),
+            ],
+        )
+        self.assertEqual("".join(run.text for run in runs), text)
+
+    def test_split_text_runs_single_script(self):
+        """Test that single-script text becomes one run."""
+        self.assertEqual(
+            self.text_shaper._split_text_runs("Hello World"),
+            [TextRun("Hello World", 0, 11, "Latin")],
+        )
+        self.assertEqual(
+            self.text_shaper._split_text_runs("สวัสดีครับ"),
+            [TextRun("สวัสดีครับ", 0, 10, "Thai")],
+        )
+        # ASCII formula markers still get their own run
+        self.assertEqual(
+            [run.script for run in self.text_shaper._split_text_runs("a {v1}")],
+            ["Latin", "Formula"],
+        )
+
     @patch("pdf2zh.text_shaper.HARFBUZZ_AVAILABLE", True)
     def test_shape_text_without_font(self):
         """Test text shaping when font loading fails."""
@@ -98,6 +149,77 @@ class TestTextShaper(unittest.TestCase):
         shaper = TextShaper()
         self.assertFalse(shaper.enabled)
 
+    @patch("pdf2zh.text_shaper.HARFBUZZ_AVAILABLE", True)
+    def test_shape_text_cache(self):
+        """Test that shaping the same text twice reuses the cached result."""
+        shaped_run = ShapedText(
+            glyphs=[GlyphInfo(1, 0, 10.0, 0.0, 0.0, 0.0)],
+            total_advance=10.0,
+            success=True,
+        )
+        with (
+            patch.object(self.text_shaper, "enabled", True),
+            patch.object(self.text_shaper, "_load_font", return_value=Mock()),
+            patch.object(
+                self.text_shaper, "_shape_run", return_value=shaped_run
+            ) as mock_shape_run,
+        ):
+            result1 = self.text_shaper.shape_text("ก", "/fake/font.ttf", 12.0)
+            result2 = self.text_shaper.shape_text("ก", "/fake/font.ttf", 12.0)
+            self.assertIs(result1, result2)
+            mock_shape_run.assert_called_once()
+
+            # A different size is shaped separately
+            self.text_shaper.shape_text("ก", "/fake/font.ttf", 14.0)
+            self.assertEqual(mock_shape_run.call_count, 2)
+
+    @patch("pdf2zh.text_shaper.HARFBUZZ_AVAILABLE", True)
+    def test_prefetch_runs_batches_per_script(self):
+        """Test that runs shaped in one buffer are split back into the run cache."""
+        # Glyphs for "กข￼ค": two glyphs, the separator, one glyph
+        shaped_batch = ShapedText(
+            glyphs=[
+                GlyphInfo(1, 0, 5.0, 0.0, 0.0, 0.0),
+                GlyphInfo(2, 1, 6.0, 0.0, 0.0, 0.0),
+                GlyphInfo(0, 2, 9.0, 0.0, 0.0, 0.0),
+                GlyphInfo(3, 3, 7.0, 0.0, 0.0, 0.0),
+            ],
+            total_advance=27.0,
+            success=True,
+        )
+        with (
+            patch.object(self.text_shaper, "enabled", True),
+            patch.object(self.text_shaper, "_load_font", return_value=Mock()),
+            patch.object(
+                self.text_shaper, "_shape_run", return_value=shaped_batch
+            ) as mock_shape_run,
+        ):
+            self.text_shaper.prefetch_runs(["กข", "ค"], "/fake/font.ttf", 12.0)
+            mock_shape_run.assert_called_once()
+            self.assertEqual(mock_shape_run.call_args.args[0].text, "กข￼ค")
+
+            shaped = self.text_shaper.shape_text("ค", "/fake/font.ttf", 12.0)
+            mock_shape_run.assert_called_once()
+        self.assertEqual([(g.glyph_id, g.cluster) for g in shaped.glyphs], [(3, 0)])
+        self.assertEqual(shaped.total_advance, 7.0)
+
+    def test_get_cluster_info(self):
+        """Test that glyphs are grouped by cluster once per shaped result."""
+        shaped = ShapedText(
+            glyphs=[
+                GlyphInfo(1, 0, 10.0, 0.0, 0.0, 0.0),
+                GlyphInfo(2, 0, 0.0, 0.0, -3.0, 5.0),
+                GlyphInfo(3, 2, 8.0, 0.0, 0.0, 0.0),
+            ],
+            total_advance=18.0,
+            success=True,
+        )
+        clusters = shaped.get_cluster_info()
+        self.assertEqual([g.glyph_id for g in clusters[0]], [1, 2])
+        self.assertEqual([g.glyph_id for g in clusters[2]], [3])
+        self.assertNotIn(1, clusters)
+        self.assertIs(shaped.get_cluster_info(), clusters)
+
     def test_get_text_advance_fallback(self):
         """Test get_text_advance with fallback to None."""
         # When shaping is not needed, should return None
@@ -133,6 +255,23 @@ class TestTextShaper(unittest.TestCase):
 
                 # Face should only be created once
                 mock_face.assert_called_once()
+
+                # Another size gets its own font on the same face
+                self.text_shaper._load_font(temp_font_path, 14.0)
+                mock_face.assert_called_once()
+                self.assertEqual(mock_font.call_count, 2)
+
+                # Shaping the same text twice only runs HarfBuzz once
+                with (
+                    patch.object(self.text_shaper, "enabled", True),
+                    patch("pdf2zh.text_shaper.hb.shape") as mock_shape,
+                ):
+                    text = "สวัสดี"
+                    shaped1 = self.text_shaper.shape_text(text, temp_font_path, 12.0)
+                    shaped2 = self.text_shaper.shape_text(text, temp_font_path, 12.0)
+                    self.assertIs(shaped1, shaped2)
+                    self.assertIsInstance(shaped1.glyphs, tuple)
+                    mock_shape.assert_called_once()
         finally:
             # Clean up
             if os.path.exists(temp_font_path):
@@ -148,6 +287,18 @@ class TestTextShaperIntegration(unittest.TestCase):
         shaper2 = get_text_shaper()
         self.assertIs(shaper1, shaper2)
 
+    @patch("pdf2zh.text_shaper.ConfigManager")
+    def test_get_text_shaper_rebuilds_on_font_change(self, mock_config):
+        """Test that a new NOTO_FONT_PATH replaces the global shaper."""
+        mock_config.get.return_value = "/fake/first.ttf"
+        shaper1 = get_text_shaper()
+        self.assertIs(get_text_shaper(), shaper1)
+
+        mock_config.get.return_value = "/fake/second.ttf"
+        shaper2 = get_text_shaper()
+        self.assertIsNot(shaper1, shaper2)
+        self.assertEqual(shaper2.default_font_path, "/fake/second.ttf")
+
     def test_thai_text_example(self):
         """Test with real Thai text example."""
         thai_text = "สวัสดีครับ ผมชื่อ จอห์น"  # "Hello, my name is John" in Thai
@@ -164,21 +315,17 @@ class TestTextShaperIntegration(unittest.TestCase):
             self.fail(f"Text shaping should not raise exception: {e}")
 
     @patch("pdf2zh.text_shaper.ConfigManager")
-    def test_configuration_integration(self):
+    def test_configuration_integration(self, mock_config):
         """Test configuration integration."""
-        # Test with shaping enabled
-        with patch("pdf2zh.text_shaper.ConfigManager.get", return_value="true"):
-            shaper = TextShaper()
-            if hasattr(shaper, "enabled"):
-                # Only test if HarfBuzz is available
-                expected = getattr(shaper, "enabled", False)
-                self.assertIsInstance(expected, bool)
+        # Test with shaping enabled; it still depends on HarfBuzz being available
+        mock_config.get.return_value = "true"
+        shaper = TextShaper()
+        self.assertIsInstance(shaper.enabled, bool)
 
         # Test with shaping disabled
-        with patch("pdf2zh.text_shaper.ConfigManager.get", return_value="false"):
-            shaper = TextShaper()
-            if hasattr(shaper, "enabled"):
-                self.assertFalse(shaper.enabled)
+        mock_config.get.return_value = "false"
+        shaper = TextShaper()
+        self.assertFalse(shaper.enabled)
 
 
 if __name__ == "__main__":
@@ -15,22 +15,24 @@ try:
 except ImportError:
     PYTHAINLP_AVAILABLE = False
 
-class TestThaiTextWrapping:
-    """Test Thai text wrapping with pythainlp integration."""
 
-    @pytest.fixture
-    def converter(self):
-        """Create a converter instance for testing."""
-        from pdf2zh.converter import TranslateConverter
-        from pdfminer.pdfinterp import PDFResourceManager
+@pytest.fixture(scope="module")
+def converter():
+    """Create one converter instance shared by the tests in this module."""
+    from pdf2zh.converter import TranslateConverter
+    from pdfminer.pdfinterp import PDFResourceManager
+
+    rsrcmgr = PDFResourceManager()
+    return TranslateConverter(
+        rsrcmgr=rsrcmgr,
+        lang_in="en",
+        lang_out="th",
+        service="google"
+    )
 
-        rsrcmgr = PDFResourceManager()
-        return TranslateConverter(
-            rsrcmgr=rsrcmgr,
-            lang_in="en",
-            lang_out="th",
-            service="google"
-        )
+
+class TestThaiTextWrapping:
+    """Test Thai text wrapping with pythainlp integration."""
 
     @pytest.mark.skipif(not PYTHAINLP_AVAILABLE, reason="pythainlp not installed")
     def test_thai_word_boundaries_simple(self, converter):
@@ -62,6 +64,21 @@ class TestThaiTextWrapping:
         assert safe_pos <= current_pos, "Safe position should not exceed current position"
         assert safe_pos > 0, "Safe position should be positive"
 
+    @pytest.mark.skipif(not PYTHAINLP_AVAILABLE, reason="pythainlp not installed")
+    def test_safe_break_point_precomputed_boundaries(self, converter, monkeypatch):
+        """Test that precomputed boundaries are reused across break attempts."""
+        text = "สวัสดีครับผมชื่อจอห์น"
+        boundaries = converter._get_thai_word_boundaries(text)
+
+        def fail_tokenize(*args, **kwargs):
+            raise AssertionError("tokenizer should not be called")
+
+        monkeypatch.setattr(converter, "_get_thai_word_boundaries", fail_tokenize)
+        for pos in (10, 14, 18):
+            safe_pos = converter._find_safe_break_point(text, pos, "th", [], boundaries)
+            assert safe_pos <= pos, "Safe position should not exceed current position"
+            assert safe_pos in boundaries, "Should break at a word boundary"
+
     def test_safe_break_point_non_thai(self, converter):
         """Test safe break point finding for non-Thai text."""
         text = "Hello world this is a test"
@@ -72,11 +89,31 @@ class TestThaiTextWrapping:
         # For non-Thai, should find space or punctuation
         assert safe_pos <= current_pos, "Safe position should not exceed current position"
 
+    def test_find_last_zwsp_before(self, converter):
+        """Test bisect lookup of the last ZWSP before a position."""
+        text = "สวัสดี\u200bครับ\u200bผม"
+        positions = [i for i, ch in enumerate(text) if ch == "\u200b"]
+
+        for pos in range(len(text) + 1):
+            expected = text.rfind("\u200b", 0, pos)
+            assert converter._find_last_zwsp_before(pos, positions) == expected
+
     def test_thai_word_boundaries_empty_text(self, converter):
         """Test Thai word boundary detection with empty text."""
         boundaries = converter._get_thai_word_boundaries("")
         assert boundaries == [], "Empty text should return empty boundaries"
 
+    def test_non_thai_text_skips_tokenizer(self, converter, monkeypatch):
+        """Text without Thai characters never reaches the tokenizer."""
+        def fail_tokenize(*args, **kwargs):
+            raise AssertionError("tokenizer should not be called")
+
+        monkeypatch.setattr("pdf2zh.converter._tokenize_thai", fail_tokenize)
+
+        text = "Formula {v1} and {v2}"
+        assert converter._get_thai_word_boundaries(text) == []
+        assert converter._add_thai_word_boundary_hints(text) == text
+
     def test_thai_word_boundaries_without_pythainlp(self, converter, monkeypatch):
         """Test graceful fallback when pythainlp is not available."""
         def mock_import_error(*args, **kwargs):
@@ -87,20 +124,21 @@ class TestThaiTextWrapping:
         boundaries = converter._get_thai_word_boundaries("สวัสดี")
         assert boundaries == [], "Should return empty list when pythainlp unavailable"
 
-    def test_calculate_text_width(self, converter):
+    def test_calculate_text_width(self, converter, monkeypatch):
         """Test text width calculation method."""
         # Mock noto font
-        converter.noto_name = "NotoSansThai"
+        monkeypatch.setattr(converter, "noto_name", "NotoSansThai")
 
         class MockNoto:
             def char_lengths(self, char, size):
                 return [size * 0.6]  # Mock width
 
-        converter.noto = MockNoto()
+        monkeypatch.setattr(converter, "noto", MockNoto())
 
         width = converter._calculate_text_width("สวัสดี", "NotoSansThai", 12.0)
         assert width > 0, "Text width should be positive"
-        assert width == len("สวัสดี") * 12.0 * 0.6, "Width should match calculation"
+        # The two combining marks in "สวัสดี" take no width, four base letters do
+        assert width == pytest.approx(4 * 12.0 * 0.6), "Width should match calculation"
 
 class TestThaiTextWrappingConfiguration:
     """Test configuration options for Thai text wrapping."""
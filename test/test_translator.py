@@ -22,6 +22,19 @@ class AutoIncreaseTranslator(BaseTranslator):
         return str(self.n)
 
 
+class BatchTranslator(AutoIncreaseTranslator):
+    name = "batch"
+    batch_size = 10
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.batches = []
+
+    def do_translate_batch(self, texts):
+        self.batches.append(list(texts))
+        return super().do_translate_batch(texts)
+
+
 class TestTranslator(unittest.TestCase):
     def setUp(self):
         self.test_db = cache.init_test_db()
@@ -82,6 +95,29 @@ class TestTranslator(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             translator.translate("Hello World")
 
+    def test_translate_batch(self):
+        translator = BatchTranslator("en", "zh", "test", False)
+        self.assertEqual(translator.translate_batch(["a", "b"]), ["1", "2"])
+
+        # Cached texts are not sent again
+        self.assertEqual(translator.translate_batch(["b", "c", "a"]), ["2", "3", "1"])
+        self.assertEqual(translator.batches, [["a", "b"], ["c"]])
+
+        # Batch results share the single-text cache
+        self.assertEqual(translator.translate("c"), "3")
+
+    def test_translate_batch_length_mismatch(self):
+        translator = BatchTranslator("en", "zh", "test", False)
+        translator.do_translate_batch = lambda texts: ["1"]
+        with self.assertRaises(ValueError):
+            translator.translate_batch(["a", "b"])
+        # Nothing from the short batch is cached
+        self.assertIsNone(translator.cache.get("a"))
+
+    def test_translate_batch_without_batch_support(self):
+        translator = AutoIncreaseTranslator("en", "zh", "test", False)
+        self.assertEqual(translator.translate_batch(["a", "b", "a"]), ["1", "2", "1"])
+
 
 class TestOpenAIlikedTranslator(unittest.TestCase):
     def setUp(self) -> None:
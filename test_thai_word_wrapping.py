@@ -5,67 +5,92 @@ Test script for Thai text wrapping functionality with pythainlp integration.
 
 import sys
 import os
+from functools import cache
 
 # Add project to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Set PDF2ZH_TEST_VERBOSE=0 to keep only failures and the pass/fail summary
+VERBOSE = os.environ.get("PDF2ZH_TEST_VERBOSE", "1") != "0"
+say = print if VERBOSE else (lambda *args, **kwargs: None)
+
+# Test sentences with different complexity levels
+WORD_BOUNDARY_CASES = (
+    {
+        "text": "สวัสดีครับ",
+        "description": "Simple greeting",
+        "expected_words": ["สวัสดี", "ครับ"]
+    },
+    {
+        "text": "ไก่ที่เป่าปี่อยู่ในป่า",
+        "description": "Complex sentence with tone marks",
+        "expected_words": ["ไก่", "ที่", "เป่า", "ปี่", "อยู่", "ใน", "ป่า"]
+    },
+    {
+        "text": "เขียนโค้ดภาษาไพธอนเป็นเรื่องสนุก",
+        "description": "Technical content",
+        "expected_words": ["เขียน", "โค้ด", "ภาษา", "ไพธอน", "เป็น", "เรื่อง", "สนุก"]
+    },
+    {
+        "text": "ผู้หญิงคนนั้นสวยมาก",
+        "description": "Sentence with complex characters",
+        "expected_words": ["ผู้หญิง", "คน", "นั้น", "สวย", "มาก"]
+    }
+)
+
+SAFE_BREAK_CASES = (
+    {
+        "text": "สวัสดีครับผมชื่อจอห์น",
+        "break_position": 15,
+        "description": "Mid-sentence break"
+    },
+    {
+        "text": "ไก่ที่เป่าปี่อยู่ในป่าใหญ่",
+        "break_position": 12,
+        "description": "Complex sentence break"
+    },
+    {
+        "text": "เขียนโค้ดภาษาไพธอน",
+        "break_position": 10,
+        "description": "Technical text break"
+    }
+)
+
+@cache
+def get_converter():
+    """Build one Thai converter and share it between the checks below."""
+    from pdf2zh.converter import TranslateConverter
+    from pdfminer.pdfinterp import PDFResourceManager
+
+    return TranslateConverter(
+        rsrcmgr=PDFResourceManager(),
+        lang_in="en",
+        lang_out="th",
+        service="google"
+    )
+
 def test_thai_word_boundaries():
     """Test Thai word boundary detection with pythainlp."""
-    print("🇹🇭 Testing Thai Word Boundary Detection")
-    print("=" * 50)
-
-    # Test sentences with different complexity levels
-    test_cases = [
-        {
-            "text": "สวัสดีครับ",
-            "description": "Simple greeting",
-            "expected_words": ["สวัสดี", "ครับ"]
-        },
-        {
-            "text": "ไก่ที่เป่าปี่อยู่ในป่า",
-            "description": "Complex sentence with tone marks",
-            "expected_words": ["ไก่", "ที่", "เป่า", "ปี่", "อยู่", "ใน", "ป่า"]
-        },
-        {
-            "text": "เขียนโค้ดภาษาไพธอนเป็นเรื่องสนุก",
-            "description": "Technical content",
-            "expected_words": ["เขียน", "โค้ด", "ภาษา", "ไพธอน", "เป็น", "เรื่อง", "สนุก"]
-        },
-        {
-            "text": "ผู้หญิงคนนั้นสวยมาก",
-            "description": "Sentence with complex characters",
-            "expected_words": ["ผู้หญิง", "คน", "นั้น", "สวย", "มาก"]
-        }
-    ]
+    say("🇹🇭 Testing Thai Word Boundary Detection")
+    say("=" * 50)
 
     try:
-        from pdf2zh.converter import TranslateConverter
-        from pdf2zh.config import ConfigManager
-        from pdfminer.pdfinterp import PDFResourceManager
-
-        # Create a dummy converter instance to test the methods
-        rsrcmgr = PDFResourceManager()
-        converter = TranslateConverter(
-            rsrcmgr=rsrcmgr,
-            lang_in="en",
-            lang_out="th",
-            service="google"
-        )
+        converter = get_converter()
 
         success_count = 0
-        total_tests = len(test_cases)
+        total_tests = len(WORD_BOUNDARY_CASES)
 
-        for i, case in enumerate(test_cases, 1):
+        for i, case in enumerate(WORD_BOUNDARY_CASES, 1):
             text = case["text"]
             description = case["description"]
             expected_words = case["expected_words"]
 
-            print(f"\nTest {i}: {description}")
-            print(f"Input: '{text}'")
+            say(f"\nTest {i}: {description}")
+            say(f"Input: '{text}'")
 
             # Test word boundary detection
             boundaries = converter._get_thai_word_boundaries(text)
-            print(f"Boundaries found: {boundaries}")
+            say(f"Boundaries found: {boundaries}")
 
             if boundaries:
                 # Reconstruct words from boundaries
@@ -75,19 +100,19 @@ def test_thai_word_boundaries():
                     words.append(text[start:boundary])
                     start = boundary
 
-                print(f"Extracted words: {words}")
-                print(f"Expected words: {expected_words}")
+                say(f"Extracted words: {words}")
+                say(f"Expected words: {expected_words}")
 
                 # Check if we got reasonable segmentation
                 if len(words) >= len(expected_words) // 2:  # Allow some flexibility
-                    print("✅ Word segmentation looks reasonable")
+                    say("✅ Word segmentation looks reasonable")
                     success_count += 1
                 else:
                     print("❌ Word segmentation seems incorrect")
             else:
                 print("❌ No word boundaries detected")
 
-        print(f"\n📊 Word Boundary Tests: {success_count}/{total_tests} passed")
+        say(f"\n📊 Word Boundary Tests: {success_count}/{total_tests} passed")
         return success_count == total_tests
 
     except Exception as e:
@@ -96,68 +121,40 @@ def test_thai_word_boundaries():
 
 def test_safe_break_point_logic():
     """Test safe break point finding logic."""
-    print("\n🔤 Testing Safe Break Point Logic")
-    print("=" * 50)
+    say("\n🔤 Testing Safe Break Point Logic")
+    say("=" * 50)
 
     try:
-        from pdf2zh.converter import TranslateConverter
-        from pdfminer.pdfinterp import PDFResourceManager
-
-        # Create a dummy converter instance
-        rsrcmgr = PDFResourceManager()
-        converter = TranslateConverter(
-            rsrcmgr=rsrcmgr,
-            lang_in="en",
-            lang_out="th",
-            service="google"
-        )
-
-        test_cases = [
-            {
-                "text": "สวัสดีครับผมชื่อจอห์น",
-                "break_position": 15,
-                "description": "Mid-sentence break"
-            },
-            {
-                "text": "ไก่ที่เป่าปี่อยู่ในป่าใหญ่",
-                "break_position": 12,
-                "description": "Complex sentence break"
-            },
-            {
-                "text": "เขียนโค้ดภาษาไพธอน",
-                "break_position": 10,
-                "description": "Technical text break"
-            }
-        ]
+        converter = get_converter()
 
         success_count = 0
-        total_tests = len(test_cases)
+        total_tests = len(SAFE_BREAK_CASES)
 
-        for i, case in enumerate(test_cases, 1):
+        for i, case in enumerate(SAFE_BREAK_CASES, 1):
             text = case["text"]
             break_pos = case["break_position"]
             description = case["description"]
 
-            print(f"\nTest {i}: {description}")
-            print(f"Text: '{text}'")
-            print(f"Break needed at position: {break_pos}")
+            say(f"\nTest {i}: {description}")
+            say(f"Text: '{text}'")
+            say(f"Break needed at position: {break_pos}")
 
             # Find safe break point
             safe_pos = converter._find_safe_break_point(text, break_pos, "th", [])
 
-            print(f"Safe break position: {safe_pos}")
+            say(f"Safe break position: {safe_pos}")
 
             if safe_pos < break_pos:
                 safe_text = text[:safe_pos]
                 remaining_text = text[safe_pos:]
-                print(f"Split result: '{safe_text}' | '{remaining_text}'")
-                print("✅ Safe break point found")
+                say(f"Split result: '{safe_text}' | '{remaining_text}'")
+                say("✅ Safe break point found")
                 success_count += 1
             else:
-                print("ℹ️ No better break point found, using original position")
+                say("ℹ️ No better break point found, using original position")
                 success_count += 1  # This is also acceptable
 
-        print(f"\n📊 Safe Break Tests: {success_count}/{total_tests} passed")
+        say(f"\n📊 Safe Break Tests: {success_count}/{total_tests} passed")
         return success_count == total_tests
 
     except Exception as e:
@@ -166,8 +163,8 @@ def test_safe_break_point_logic():
 
 def test_configuration_options():
     """Test configuration options for Thai text wrapping."""
-    print("\n⚙️ Testing Configuration Options")
-    print("=" * 50)
+    say("\n⚙️ Testing Configuration Options")
+    say("=" * 50)
 
     try:
         from pdf2zh.config import ConfigManager
@@ -177,9 +174,9 @@ def test_configuration_options():
         min_line_usage = ConfigManager.get("THAI_MIN_LINE_USAGE", "0.3")
         tokenizer_engine = ConfigManager.get("THAI_TOKENIZER_ENGINE", "newmm")
 
-        print(f"Default THAI_WORD_WRAP_ENABLED: {thai_wrap_enabled}")
-        print(f"Default THAI_MIN_LINE_USAGE: {min_line_usage}")
-        print(f"Default THAI_TOKENIZER_ENGINE: {tokenizer_engine}")
+        say(f"Default THAI_WORD_WRAP_ENABLED: {thai_wrap_enabled}")
+        say(f"Default THAI_MIN_LINE_USAGE: {min_line_usage}")
+        say(f"Default THAI_TOKENIZER_ENGINE: {tokenizer_engine}")
 
         # Test setting custom values
         ConfigManager.set("THAI_WORD_WRAP_ENABLED", "false")
@@ -191,17 +188,17 @@ def test_configuration_options():
         new_min_usage = ConfigManager.get("THAI_MIN_LINE_USAGE")
         new_engine = ConfigManager.get("THAI_TOKENIZER_ENGINE")
 
-        print(f"\nAfter setting custom values:")
-        print(f"THAI_WORD_WRAP_ENABLED: {new_wrap_enabled}")
-        print(f"THAI_MIN_LINE_USAGE: {new_min_usage}")
-        print(f"THAI_TOKENIZER_ENGINE: {new_engine}")
+        say(f"\nAfter setting custom values:")
+        say(f"THAI_WORD_WRAP_ENABLED: {new_wrap_enabled}")
+        say(f"THAI_MIN_LINE_USAGE: {new_min_usage}")
+        say(f"THAI_TOKENIZER_ENGINE: {new_engine}")
 
         # Restore defaults
         ConfigManager.set("THAI_WORD_WRAP_ENABLED", "true")
         ConfigManager.set("THAI_MIN_LINE_USAGE", "0.3")
         ConfigManager.set("THAI_TOKENIZER_ENGINE", "newmm")
 
-        print("\n✅ Configuration options working correctly")
+        say("\n✅ Configuration options working correctly")
         return True
 
     except Exception as e:
@@ -210,24 +207,24 @@ def test_configuration_options():
 
 def test_pythainlp_availability():
     """Test if pythainlp is available and working."""
-    print("\n📦 Testing pythainlp Availability")
-    print("=" * 50)
+    say("\n📦 Testing pythainlp Availability")
+    say("=" * 50)
 
     try:
         import pythainlp
-        print(f"✅ pythainlp version: {pythainlp.__version__}")
+        say(f"✅ pythainlp version: {pythainlp.__version__}")
 
         # Test basic tokenization
         test_text = "สวัสดีครับ"
         words = pythainlp.word_tokenize(test_text, engine='newmm')
-        print(f"✅ Tokenization test: '{test_text}' -> {words}")
+        say(f"✅ Tokenization test: '{test_text}' -> {words}")
 
         # Test different engines
         engines = ['newmm', 'mm', 'longest']
         for engine in engines:
             try:
                 words = pythainlp.word_tokenize(test_text, engine=engine)
-                print(f"✅ Engine '{engine}': {words}")
+                say(f"✅ Engine '{engine}': {words}")
             except Exception as e:
                 print(f"⚠️ Engine '{engine}' not available: {e}")
 
@@ -235,7 +232,7 @@ def test_pythainlp_availability():
 
     except ImportError:
         print("❌ pythainlp is not installed")
-        print("💡 Run: pip install pythainlp")
+        say("💡 Run: pip install pythainlp")
         return False
     except Exception as e:
         print(f"❌ Error testing pythainlp: {e}")
@@ -243,36 +240,36 @@ def test_pythainlp_availability():
 
 def demonstrate_integration():
     """Demonstrate the complete Thai text wrapping integration."""
-    print("\n🚀 Demonstrating Thai Text Wrapping Integration")
-    print("=" * 60)
+    say("\n🚀 Demonstrating Thai Text Wrapping Integration")
+    say("=" * 60)
 
     example_text = "ไก่ที่เป่าปี่อยู่ในป่าใหญ่และมีต้นไผ่เยอะมาก"
 
-    print(f"Example Thai text: '{example_text}'")
-    print("\nKey Features Implemented:")
-    print("1. ✅ pythainlp dependency added to pyproject.toml")
-    print("2. ✅ _get_thai_word_boundaries() method for word segmentation")
-    print("3. ✅ _find_safe_break_point() method for smart line breaking")
-    print("4. ✅ Enhanced line wrapping logic in receive_layout()")
-    print("5. ✅ Configuration options for customization")
-
-    print("\nConfiguration Options Available:")
-    print("- THAI_WORD_WRAP_ENABLED: Enable/disable Thai word wrapping")
-    print("- THAI_MIN_LINE_USAGE: Minimum line usage before allowing wrap (default: 0.3)")
-    print("- THAI_TOKENIZER_ENGINE: pythainlp engine (newmm, mm, longest)")
-
-    print("\nHow it works:")
-    print("1. When text approaches right boundary, check if target language is Thai")
-    print("2. Use pythainlp to find word boundaries in current text")
-    print("3. Find safe break point that respects word boundaries")
-    print("4. Split text at word boundary instead of character boundary")
-    print("5. Continue with remaining text on next line")
-
-    print("\n💡 Benefits:")
-    print("- No more mid-word line breaks in Thai text")
-    print("- Maintains readability and professional appearance")
-    print("- Configurable and fallback-safe")
-    print("- Integrates seamlessly with existing HarfBuzz text shaping")
+    say(f"Example Thai text: '{example_text}'")
+    say("\nKey Features Implemented:")
+    say("1. ✅ pythainlp dependency added to pyproject.toml")
+    say("2. ✅ _get_thai_word_boundaries() method for word segmentation")
+    say("3. ✅ _find_safe_break_point() method for smart line breaking")
+    say("4. ✅ Enhanced line wrapping logic in receive_layout()")
+    say("5. ✅ Configuration options for customization")
+
+    say("\nConfiguration Options Available:")
+    say("- THAI_WORD_WRAP_ENABLED: Enable/disable Thai word wrapping")
+    say("- THAI_MIN_LINE_USAGE: Minimum line usage before allowing wrap (default: 0.3)")
+    say("- THAI_TOKENIZER_ENGINE: pythainlp engine (newmm, mm, longest)")
+
+    say("\nHow it works:")
+    say("1. When text approaches right boundary, check if target language is Thai")
+    say("2. Use pythainlp to find word boundaries in current text")
+    say("3. Find safe break point that respects word boundaries")
+    say("4. Split text at word boundary instead of character boundary")
+    say("5. Continue with remaining text on next line")
+
+    say("\n💡 Benefits:")
+    say("- No more mid-word line breaks in Thai text")
+    say("- Maintains readability and professional appearance")
+    say("- Configurable and fallback-safe")
+    say("- Integrates seamlessly with existing HarfBuzz text shaping")
 
 def main():
     """Run all tests and demonstrations."""
@@ -5,27 +5,31 @@ Test script to verify the improved Thai word wrapping implementation.
 
 import sys
 import os
+from functools import cache
 
 # Add project to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+@cache
+def get_converter():
+    """Build one Thai converter and share it between the checks below."""
+    from pdf2zh.converter import TranslateConverter
+    from pdfminer.pdfinterp import PDFResourceManager
+
+    return TranslateConverter(
+        rsrcmgr=PDFResourceManager(),
+        lang_in="en",
+        lang_out="th",
+        service="google"
+    )
+
 def test_thai_word_boundary_hints():
     """Test the new Thai word boundary hint system."""
     print("🇹🇭 Testing Thai Word Boundary Hints")
     print("=" * 50)
 
     try:
-        from pdf2zh.converter import TranslateConverter
-        from pdfminer.pdfinterp import PDFResourceManager
-
-        # Create a dummy converter instance to test the methods
-        rsrcmgr = PDFResourceManager()
-        converter = TranslateConverter(
-            rsrcmgr=rsrcmgr,
-            lang_in="en",
-            lang_out="th",
-            service="google"
-        )
+        converter = get_converter()
 
         test_cases = [
             "ไก่ที่เป่าปี่อยู่ในป่า",
@@ -43,25 +47,18 @@ def test_thai_word_boundary_hints():
             # Test the word boundary hint addition
             processed_text = converter._add_thai_word_boundary_hints(text)
 
-            # Check if zero-width spaces were added
-            zwsp_count = processed_text.count('\u200B')
+            # One split gives the segments and the hint count
+            words = processed_text.split('\u200B')
+            zwsp_count = len(words) - 1
 
             if zwsp_count > 0:
                 print(f"✅ Added {zwsp_count} word boundary hints")
 
                 # Show where the breaks would occur
-                words = processed_text.split('\u200B')
                 print(f"   Word segments: {' | '.join(words)}")
 
-                # Test that zero-width spaces are properly handled in raw_string
-                # (This would be called by the actual rendering system)
-                class MockRawString:
-                    def __call__(self, fcur, cstk):
-                        # Simulate the raw_string function's ZWSP removal
-                        return cstk.replace('\u200B', '')
-
-                mock_raw_string = MockRawString()
-                cleaned_text = mock_raw_string("test_font", processed_text)
+                # Strip zero-width spaces the way raw_string does before encoding
+                cleaned_text = processed_text.replace('\u200B', '')
 
                 if cleaned_text == text:
                     print(f"✅ Zero-width spaces correctly removed for rendering")
@@ -109,16 +106,7 @@ def test_formula_preservation():
     print("=" * 50)
 
     try:
-        from pdf2zh.converter import TranslateConverter
-        from pdfminer.pdfinterp import PDFResourceManager
-
-        rsrcmgr = PDFResourceManager()
-        converter = TranslateConverter(
-            rsrcmgr=rsrcmgr,
-            lang_in="en",
-            lang_out="th",
-            service="google"
-        )
+        converter = get_converter()
 
         # Test text with formula markers
         test_text = "สมการ {v1} คือสูตรสำคัญในฟิสิกส์ {v2} ที่ใช้คำนวณ"